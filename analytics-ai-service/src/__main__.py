@@ -32,6 +32,8 @@ async def lifespan(app: FastAPI):
     app.state.service_container = ServiceContainerBuilder(
         settings=settings, pipe_components=pipe_components
     ).build()
+    if settings.warmup_services:
+        app.state.service_container.warmup()
     app.state.service_metadata = create_service_metadata(pipe_components)
     init_langfuse(settings)
 
@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 
 import yaml
 from dotenv import load_dotenv
@@ -42,6 +43,18 @@ class Settings(BaseSettings):
     allow_sql_functions_retrieval: bool = Field(default=True)
     max_histories: int = Field(default=5)
     max_sql_correction_retries: int = Field(default=3)
+    # reuse the intent of an earlier, near-identical question (cosine similarity of
+    # the query embeddings); unset disables the cache
+    intent_classification_semantic_cache_threshold: Optional[float] = Field(
+        default=None
+    )
+    # seconds before intent classification gives up and falls back to TEXT_TO_SQL
+    intent_classification_timeout: Optional[float] = Field(default=15.0)
+    # how many small models share one semantics description LLM call
+    semantics_description_models_per_call: int = Field(default=1, ge=1)
+    # seconds relationship recommendation and semantics description reuse the reply
+    # to an identical prompt; 0 disables the cache
+    generation_cache_ttl: int = Field(default=3600, ge=0)
 
     # engine config
     engine_timeout: float = Field(default=30.0)
@@ -55,6 +68,9 @@ class Settings(BaseSettings):
         so we set it to 1_000_000, which is a large number
         """,
     )
+    # build every service (concurrently) at startup instead of on first request;
+    # off by default so startup only pays for the services that are actually used
+    warmup_services: bool = Field(default=False)
 
     # user guide config
     is_oss: bool = Field(default=True)
@@ -64,6 +80,8 @@ class Settings(BaseSettings):
     # in order to use langfuse, we also need to set the LANGFUSE_SECRET_KEY and LANGFUSE_PUBLIC_KEY in the .env or .env.dev file
     langfuse_host: str = Field(default="https://cloud.langfuse.com")
     langfuse_enable: bool = Field(default=True)
+    # fraction of requests traced; the others skip span export altogether
+    langfuse_sample_rate: float = Field(default=1.0, ge=0.0, le=1.0)
 
     # debug config
     logging_level: str = Field(default="INFO")
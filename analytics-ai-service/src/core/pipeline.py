@@ -1,8 +1,12 @@
+import functools
+import os
+import sys
 from abc import ABCMeta, abstractmethod
 from collections.abc import Mapping
 from dataclasses import dataclass
 from typing import Any, Dict, Generic, Optional, TypeVar
 
+from hamilton import base, telemetry
 from hamilton.async_driver import AsyncDriver
 from hamilton.driver import Driver
 from haystack import Pipeline
@@ -11,6 +15,22 @@ from pydantic import BaseModel, Field
 from src.core.engine import Engine
 from src.core.provider import DocumentStoreProvider, EmbedderProvider, LLMProvider
 
+# Hamilton reports usage on every driver construction and, for its first 1000 runs,
+# on every execute call (an extra task plus a thread doing an HTTP request each).
+# Set HAMILTON_TELEMETRY_ENABLED explicitly to leave the decision to Hamilton.
+if os.getenv("HAMILTON_TELEMETRY_ENABLED") is None:
+    telemetry.disable_telemetry()
+
+
+@functools.cache
+def get_async_driver(module_name: str) -> AsyncDriver:
+    """
+    Hamilton scans the module for nodes and builds its graph when the driver is
+    created. Execution state lives in each execute call, so pipeline instances
+    defined in the same module can share one driver.
+    """
+    return AsyncDriver({}, sys.modules[module_name], result_builder=base.DictResult())
+
 
 class BasicPipeline(metaclass=ABCMeta):
     def __init__(self, pipe: Pipeline | AsyncDriver | Driver):
@@ -21,21 +41,23 @@ class BasicPipeline(metaclass=ABCMeta):
         ...
 
 
-@dataclass
+@dataclass(slots=True)
 class PipelineComponent(Mapping):
     llm_provider: LLMProvider = None
     embedder_provider: EmbedderProvider = None
     document_store_provider: DocumentStoreProvider = None
     engine: Engine = None
 
+    FIELDS = ("llm_provider", "embedder_provider", "document_store_provider", "engine")
+
     def __getitem__(self, key):
         return getattr(self, key)
 
     def __iter__(self):
-        return iter(self.__dict__)
+        return iter(self.FIELDS)
 
     def __len__(self):
-        return len(self.__dict__)
+        return len(self.FIELDS)
 
 
 # Typed pipeline primitives (non-breaking additions)
@@ -69,6 +91,15 @@ class EnhancedBasicPipeline(BasicPipeline, Generic[TInput, TOutput]):
     input_model: Optional[type[BaseModel]] = None
     output_model: Optional[type[BaseModel]] = None
 
+    # PipelineResult parameterized with output_model, resolved once per subclass
+    _result_cls: Optional[type[PipelineResult]] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._result_cls = (
+            None if cls.output_model is None else PipelineResult[cls.output_model]
+        )
+
     def __init__(self, pipe: Pipeline | AsyncDriver | Driver):
         super().__init__(pipe)
 
@@ -82,4 +113,7 @@ class EnhancedBasicPipeline(BasicPipeline, Generic[TInput, TOutput]):
     async def run(self, *args: Any, **kwargs: Any) -> PipelineResult[TOutput]:
         self.validate_input(*args, **kwargs)
         data = await self._execute(*args, **kwargs)
-        return PipelineResult[TOutput](success=True, data=data)
+        if self._result_cls is None:
+            # nothing to validate the data against, so skip pydantic validation
+            return PipelineResult.model_construct(success=True, data=data)
+        return self._result_cls(success=True, data=data)
@@ -1,32 +1,303 @@
 import logging
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
+from functools import cache, cached_property, partial
+from types import MappingProxyType
+from typing import Optional
 
-import toml
+import tomllib
 
 from src.config import Settings
-from src.core.builder import ServiceContainerBuilder
+from src.core.builder import ServiceContainerBuilder, build_concurrently
 from src.core.pipeline import PipelineComponent
 from src.core.provider import EmbedderProvider, LLMProvider
+from src.pipelines import generation, indexing, retrieval
+from src.utils import fetch_analytics_docs
 from src.web.v1 import services
 
 logger = logging.getLogger("analytics-service")
 
 
-@dataclass
 class ServiceContainer:
-    ask_service: services.AskService
-    ask_feedback_service: services.AskFeedbackService
-    question_recommendation: services.QuestionRecommendation
-    relationship_recommendation: services.RelationshipRecommendation
-    semantics_description: services.SemanticsDescription
-    semantics_preparation_service: services.SemanticsPreparationService
-    chart_service: services.ChartService
-    chart_adjustment_service: services.ChartAdjustmentService
-    sql_answer_service: services.SqlAnswerService
-    sql_pairs_service: services.SqlPairsService
-    sql_question_service: services.SqlQuestionService
-    instructions_service: services.InstructionsService
-    sql_correction_service: services.SqlCorrectionService
+    """
+    Services are constructed on first attribute access, so only the services
+    actually hit by incoming routes pay their pipeline construction cost.
+    """
+
+    SERVICES = (
+        "ask_service",
+        "ask_feedback_service",
+        "question_recommendation",
+        "relationship_recommendation",
+        "semantics_description",
+        "semantics_preparation_service",
+        "chart_service",
+        "chart_adjustment_service",
+        "sql_answer_service",
+        "sql_pairs_service",
+        "sql_question_service",
+        "instructions_service",
+        "sql_correction_service",
+    )
+
+    def __init__(
+        self,
+        settings: Settings,
+        pipe_components: dict[str, PipelineComponent],
+        shared: dict[str, object],
+    ):
+        self._settings = settings
+        self._pipe_components = pipe_components
+        self._shared = shared
+        # built once and splatted read-only into every service constructor
+        self._query_cache = MappingProxyType(
+            {
+                "maxsize": settings.query_cache_maxsize,
+                "ttl": settings.query_cache_ttl,
+            }
+        )
+
+    def warmup(self, names: Optional[list[str]] = None) -> "ServiceContainer":
+        names = names or self.SERVICES
+        # cached_property has no lock, so state shared between services is resolved
+        # before the concurrent build rather than computed once per thread
+        if "ask_service" in names:
+            self._analytics_docs
+        build_concurrently({name: partial(getattr, self, name) for name in names})
+        return self
+
+    @cached_property
+    def _analytics_docs(self) -> list[dict]:
+        return fetch_analytics_docs(self._settings.doc_endpoint, self._settings.is_oss)
+
+    @cached_property
+    def semantics_description(self) -> services.SemanticsDescription:
+        pc = self._pipe_components
+        s = self._settings
+
+        return services.SemanticsDescription(
+            pipelines={
+                "semantics_description": generation.SemanticsDescription(
+                    **pc["semantics_description"],
+                    generation_cache_ttl=s.generation_cache_ttl,
+                )
+            },
+            **self._query_cache,
+            models_per_call=s.semantics_description_models_per_call,
+        )
+
+    @cached_property
+    def semantics_preparation_service(self) -> services.SemanticsPreparationService:
+        pc = self._pipe_components
+        s = self._settings
+        shared = self._shared
+
+        return services.SemanticsPreparationService(
+            pipelines={
+                "db_schema": indexing.DBSchema(
+                    **pc["db_schema_indexing"],
+                    column_batch_size=s.column_indexing_batch_size,
+                ),
+                "historical_question": indexing.HistoricalQuestion(
+                    **pc["historical_question_indexing"],
+                ),
+                "table_description": indexing.TableDescription(
+                    **pc["table_description_indexing"],
+                ),
+                "sql_pairs": shared["sql_pairs_indexing"],
+                "instructions": shared["instructions_indexing"],
+                "project_meta": indexing.ProjectMeta(
+                    **pc["project_meta_indexing"],
+                ),
+            },
+            **self._query_cache,
+        )
+
+    @cached_property
+    def ask_service(self) -> services.AskService:
+        pc = self._pipe_components
+        s = self._settings
+        shared = self._shared
+
+        return services.AskService(
+            pipelines={
+                "intent_classification": generation.IntentClassification(
+                    **pc["intent_classification"],
+                    analytics_docs=self._analytics_docs,
+                    semantic_cache_threshold=s.intent_classification_semantic_cache_threshold,
+                    timeout=s.intent_classification_timeout,
+                ),
+                "misleading_assistance": generation.MisleadingAssistance(
+                    **pc["misleading_assistance"],
+                ),
+                "data_assistance": generation.DataAssistance(**pc["data_assistance"]),
+                "user_guide_assistance": generation.UserGuideAssistance(
+                    **pc["user_guide_assistance"],
+                    analytics_docs=self._analytics_docs,
+                ),
+                "db_schema_retrieval": shared["db_schema_retrieval"],
+                "historical_question": retrieval.HistoricalQuestionRetrieval(
+                    **pc["historical_question_retrieval"],
+                    historical_question_retrieval_similarity_threshold=s.historical_question_retrieval_similarity_threshold,
+                ),
+                "sql_pairs_retrieval": shared["sql_pairs_retrieval"],
+                "instructions_retrieval": shared["instructions_retrieval"],
+                "sql_generation": shared["sql_generation"],
+                "sql_generation_reasoning": generation.SQLGenerationReasoning(
+                    **pc["sql_generation_reasoning"],
+                ),
+                "followup_sql_generation_reasoning": generation.FollowUpSQLGenerationReasoning(
+                    **pc["followup_sql_generation_reasoning"],
+                ),
+                "sql_correction": shared["sql_correction"],
+                "followup_sql_generation": generation.FollowUpSQLGeneration(
+                    **pc["followup_sql_generation"],
+                ),
+                "sql_functions_retrieval": shared["sql_functions_retrieval"],
+            },
+            allow_intent_classification=s.allow_intent_classification,
+            allow_sql_generation_reasoning=s.allow_sql_generation_reasoning,
+            allow_sql_functions_retrieval=s.allow_sql_functions_retrieval,
+            max_histories=s.max_histories,
+            enable_column_pruning=s.enable_column_pruning,
+            max_sql_correction_retries=s.max_sql_correction_retries,
+            **self._query_cache,
+        )
+
+    @cached_property
+    def ask_feedback_service(self) -> services.AskFeedbackService:
+        pc = self._pipe_components
+        shared = self._shared
+
+        return services.AskFeedbackService(
+            pipelines={
+                "db_schema_retrieval": shared["db_schema_retrieval"],
+                "sql_pairs_retrieval": shared["sql_pairs_retrieval"],
+                "instructions_retrieval": shared["instructions_retrieval"],
+                "sql_functions_retrieval": shared["sql_functions_retrieval"],
+                "sql_regeneration": generation.SQLRegeneration(
+                    **pc["sql_regeneration"],
+                ),
+                "sql_correction": shared["sql_correction"],
+            },
+            allow_sql_functions_retrieval=self._settings.allow_sql_functions_retrieval,
+            **self._query_cache,
+        )
+
+    @cached_property
+    def chart_service(self) -> services.ChartService:
+        return services.ChartService(
+            pipelines={
+                "sql_executor": self._shared["sql_executor"],
+                "chart_generation": generation.ChartGeneration(
+                    **self._pipe_components["chart_generation"],
+                ),
+            },
+            **self._query_cache,
+        )
+
+    @cached_property
+    def chart_adjustment_service(self) -> services.ChartAdjustmentService:
+        return services.ChartAdjustmentService(
+            pipelines={
+                "sql_executor": self._shared["sql_executor"],
+                "chart_adjustment": generation.ChartAdjustment(
+                    **self._pipe_components["chart_adjustment"],
+                ),
+            },
+            **self._query_cache,
+        )
+
+    @cached_property
+    def sql_answer_service(self) -> services.SqlAnswerService:
+        pc = self._pipe_components
+
+        return services.SqlAnswerService(
+            pipelines={
+                "preprocess_sql_data": retrieval.PreprocessSqlData(
+                    **pc["preprocess_sql_data"],
+                ),
+                "sql_answer": generation.SQLAnswer(
+                    **pc["sql_answer"],
+                ),
+            },
+            **self._query_cache,
+        )
+
+    @cached_property
+    def relationship_recommendation(self) -> services.RelationshipRecommendation:
+        return services.RelationshipRecommendation(
+            pipelines={
+                "relationship_recommendation": generation.RelationshipRecommendation(
+                    **self._pipe_components["relationship_recommendation"],
+                    generation_cache_ttl=self._settings.generation_cache_ttl,
+                )
+            },
+            **self._query_cache,
+        )
+
+    @cached_property
+    def question_recommendation(self) -> services.QuestionRecommendation:
+        pc = self._pipe_components
+        shared = self._shared
+
+        return services.QuestionRecommendation(
+            pipelines={
+                "question_recommendation": generation.QuestionRecommendation(
+                    **pc["question_recommendation"],
+                ),
+                "db_schema_retrieval": shared["db_schema_retrieval"],
+                "sql_generation": shared["question_recommendation_sql_generation"],
+                "sql_pairs_retrieval": shared["sql_pairs_retrieval"],
+                "instructions_retrieval": shared["instructions_retrieval"],
+                "sql_functions_retrieval": shared["sql_functions_retrieval"],
+            },
+            allow_sql_functions_retrieval=self._settings.allow_sql_functions_retrieval,
+            **self._query_cache,
+        )
+
+    @cached_property
+    def sql_pairs_service(self) -> services.SqlPairsService:
+        return services.SqlPairsService(
+            pipelines={
+                "sql_pairs": self._shared["sql_pairs_indexing"],
+            },
+            **self._query_cache,
+        )
+
+    @cached_property
+    def sql_question_service(self) -> services.SqlQuestionService:
+        return services.SqlQuestionService(
+            pipelines={
+                "sql_question_generation": generation.SQLQuestion(
+                    **self._pipe_components["sql_question_generation"],
+                )
+            },
+            **self._query_cache,
+        )
+
+    @cached_property
+    def instructions_service(self) -> services.InstructionsService:
+        return services.InstructionsService(
+            pipelines={
+                "instructions_indexing": self._shared["instructions_indexing"],
+            },
+            **self._query_cache,
+        )
+
+    @cached_property
+    def sql_correction_service(self) -> services.SqlCorrectionService:
+        shared = self._shared
+
+        return services.SqlCorrectionService(
+            pipelines={
+                "sql_tables_extraction": generation.SQLTablesExtraction(
+                    **self._pipe_components["sql_tables_extraction"],
+                ),
+                "db_schema_retrieval": shared["db_schema_retrieval"],
+                "sql_correction": shared["sql_correction"],
+            },
+            **self._query_cache,
+        )
 
 
 @dataclass
@@ -51,6 +322,12 @@ def get_service_container():
     return app.state.service_container
 
 
+@cache
+def _get_version_from_pyproject(pyproject_path: str) -> str:
+    with open(pyproject_path, "rb") as f:
+        return tomllib.load(f)["tool"]["poetry"]["version"]
+
+
 def create_service_metadata(
     pipe_components: dict[str, PipelineComponent],
     pyproject_path: str = "pyproject.toml",
@@ -59,15 +336,9 @@ def create_service_metadata(
     This service metadata is used for logging purposes and will be sent to Langfuse.
     """
 
-    def _get_version_from_pyproject() -> str:
-        with open(pyproject_path, "r") as f:
-            pyproject = toml.load(f)
-            return pyproject["tool"]["poetry"]["version"]
-
     def _convert_pipe_metadata(
         llm_provider: LLMProvider,
         embedder_provider: EmbedderProvider,
-        **_,
     ) -> dict:
         llm_metadata = (
             {
@@ -88,11 +359,13 @@ def create_service_metadata(
         return {**llm_metadata, **embedding_metadata}
 
     pipes_metadata = {
-        pipe_name: _convert_pipe_metadata(**asdict(component))
+        pipe_name: _convert_pipe_metadata(
+            component.llm_provider, component.embedder_provider
+        )
         for pipe_name, component in pipe_components.items()
     }
 
-    service_version = _get_version_from_pyproject()
+    service_version = _get_version_from_pyproject(pyproject_path)
 
     logger.info(f"Service version: {service_version}")
 
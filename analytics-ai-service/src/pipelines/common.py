@@ -1,7 +1,30 @@
+import ast
+import asyncio
+import functools
+import hashlib
 import re
-from typing import Any, List, Optional, Tuple
+import time
+from collections import defaultdict, deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
+import numpy as np
+import orjson
+from cachetools import LRUCache, TTLCache
 from haystack import Document, component
+from haystack.components.builders.prompt_builder import PromptBuilder
+
+T = TypeVar("T")
 
 
 def get_engine_supported_data_type(data_type: str) -> str:
@@ -64,6 +87,21 @@ def build_table_ddl(
     )
 
 
+_TABLE_DDLS = LRUCache(maxsize=2048)
+
+
+def build_cached_table_ddl(content: dict) -> Tuple[str, bool, bool]:
+    """
+    build_table_ddl over all columns of a table. Schemas only change on redeploy, so
+    the result is cached under the serialized schema, which is much cheaper to
+    produce than the DDL itself.
+    """
+    key = orjson.dumps(content)
+    if (ddl := _TABLE_DDLS.get(key)) is None:
+        ddl = _TABLE_DDLS[key] = build_table_ddl(content)
+    return ddl
+
+
 async def retrieve_metadata(project_id: str, retriever) -> dict[str, Any]:
     filters = None
     if project_id:
@@ -105,8 +143,313 @@ class ScoreFilter:
         }
 
 
+def parse_document_content(content: str) -> Any:
+    """
+    Schema and table description documents are indexed as JSON. Documents indexed
+    before that hold a Python repr of the same dict, which is still accepted.
+    """
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return ast.literal_eval(content)
+
+
+def construct_table_schemas(documents: list[Document]) -> list[dict]:
+    """
+    A table is indexed as one TABLE document plus TABLE_COLUMNS documents holding
+    batches of its columns. They are merged per table name in a single pass; tables
+    missing either part are dropped.
+    """
+    schemas = defaultdict(dict)
+    for document in documents:
+        content = parse_document_content(document.content)
+        if content["type"] == "TABLE":
+            schemas[document.meta["name"]].update(content)
+        elif content["type"] == "TABLE_COLUMNS":
+            schemas[document.meta["name"]].setdefault("columns", []).extend(
+                content["columns"]
+            )
+
+    return [
+        schema
+        for schema in schemas.values()
+        if "type" in schema and "columns" in schema
+    ]
+
+
 MULTIPLE_NEW_LINE_REGEX = re.compile(r"\n{3,}")
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+
+def parse_json_reply(text: str) -> Any:
+    """
+    Parses a JSON reply of a generator as-is. Raw newlines or tabs inside string
+    values make a reply invalid JSON, so only then is the whitespace collapsed and
+    the parse retried.
+    """
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return orjson.loads(WHITESPACE_REGEX.sub(" ", text))
 
 
 def clean_up_new_lines(text: str) -> str:
+    # most rendered prompts have nothing to collapse; a substring probe is far
+    # cheaper than a regex scan over a multi-KB prompt
+    if "\n\n\n\n" not in text:
+        return text
     return MULTIPLE_NEW_LINE_REGEX.sub("\n\n\n", text)
+
+
+def compact_prompt(text: str) -> str:
+    """
+    Drops the surrounding blank lines and trailing spaces of a prompt literal once,
+    at import, instead of sending them with every request. Lines are never joined,
+    so Jinja tags keep their own lines.
+    """
+    return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+
+@functools.lru_cache(maxsize=64)
+def get_prompt_builder(template: str) -> PromptBuilder:
+    """
+    Parsing a Jinja template is the expensive part of building a PromptBuilder, and
+    rendering does not mutate the builder, so one instance per template is shared by
+    every pipeline instance.
+    """
+    return PromptBuilder(template=template)
+
+
+class StreamBuffer:
+    """
+    Unbounded FIFO of streamed chunks for a single consumer: a deque plus one event
+    the consumer parks on while the deque is empty. Appending is a plain deque
+    append, and the consumer drains whatever has accumulated per wake-up.
+    """
+
+    __slots__ = ("_chunks", "_ready")
+
+    def __init__(self):
+        self._chunks: Deque[str] = deque()
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def put_nowait(self, chunk: str) -> None:
+        self._chunks.append(chunk)
+        self._ready.set()
+
+    def popleft(self) -> str:
+        return self._chunks.popleft()
+
+    async def wait(self, timeout: float) -> None:
+        """Return once a chunk is buffered; raises TimeoutError after `timeout`."""
+        if not self._chunks:
+            self._ready.clear()
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+
+
+class StreamingQueues:
+    """
+    Per-query_id buffers bridging a generator's streaming callback to the consumer
+    of `get_streaming_results`. A buffer is normally dropped once its consumer sees
+    `<DONE>`; buffers that stay idle for `ttl` seconds (the client went away, or the
+    stream never started) are swept whenever a new buffer is created.
+    """
+
+    def __init__(self, ttl: float = 180.0, sweep_interval: float = 30.0):
+        self._queues: Dict[str, StreamBuffer] = {}
+        self._last_used: Dict[str, float] = {}
+        self._ttl = ttl
+        self._sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+
+    def __contains__(self, query_id: str) -> bool:
+        return query_id in self._queues
+
+    def __len__(self) -> int:
+        return len(self._queues)
+
+    def get(self, query_id: str) -> StreamBuffer:
+        now = time.monotonic()
+        queue = self._queues.get(query_id)
+        if queue is None:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            queue = self._queues[query_id] = StreamBuffer()
+        self._last_used[query_id] = now
+        return queue
+
+    async def consume(self, query_id: str, timeout: float = 120.0):
+        """
+        Yield the non-empty chunks streamed for `query_id` until `<DONE>`, or until no
+        chunk arrives for `timeout` seconds.
+        """
+        buffer = self.get(query_id)
+        try:
+            while True:
+                try:
+                    await buffer.wait(timeout)
+                except TimeoutError:
+                    return
+
+                while buffer:
+                    chunk = buffer.popleft()
+                    if chunk == "<DONE>":
+                        return
+                    if chunk:
+                        yield chunk
+        finally:
+            self.discard(query_id)
+
+    def discard(self, query_id: str) -> None:
+        self._queues.pop(query_id, None)
+        self._last_used.pop(query_id, None)
+
+    def _sweep(self, now: float) -> None:
+        expired_before = now - self._ttl
+        for query_id in [
+            query_id
+            for query_id, last_used in self._last_used.items()
+            if last_used < expired_before
+        ]:
+            self.discard(query_id)
+        self._next_sweep = now + self._sweep_interval
+
+
+class InflightCoalescer:
+    """
+    Concurrent calls with the same key share a single execution: the first caller
+    starts it and later callers await the same result (or exception). Nothing is
+    kept once the call finishes, so this only merges requests that overlap in time,
+    e.g. the same chart requested twice by a double-submitted form.
+
+    `run` returns the result along with whether it was shared from another caller's
+    execution, so that only the caller that started it reports its cost.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(
+        self, key: Hashable, factory: Callable[[], Awaitable[T]]
+    ) -> Tuple[T, bool]:
+        future = self._inflight.get(key)
+        shared = future is not None
+        if not shared:
+            future = self._inflight[key] = asyncio.ensure_future(factory())
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # a cancelled caller must not cancel the call for the others sharing it
+        return await asyncio.shield(future), shared
+
+    async def generate(
+        self, generator: Callable[..., Awaitable[dict]], prompt: str
+    ) -> dict:
+        """
+        Runs `generator(prompt=prompt)` once for overlapping identical prompts. A
+        caller sharing another caller's call gets the result without `meta`, so the
+        LLM usage is traced only by the caller that started it.
+        """
+        result, shared = await self.run(
+            _generation_key(generator, prompt), lambda: generator(prompt=prompt)
+        )
+        if shared:
+            return {k: v for k, v in result.items() if k != "meta"}
+        return result
+
+
+def _generation_key(generator: Any, prompt: str) -> Tuple[Any, bytes]:
+    return generator, hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+
+
+# shared by every generation pipeline; keys include the generator, so different
+# pipelines never share a call
+INFLIGHT_GENERATIONS = InflightCoalescer()
+
+
+class GenerationCache:
+    """
+    Keeps LLM replies by generator and prompt for `ttl` seconds, so an identical
+    prompt reuses the earlier reply instead of another LLM call; `ttl=0` disables
+    it. A miss goes through INFLIGHT_GENERATIONS, so identical prompts arriving
+    before the first reply is cached share one call rather than each paying for it.
+    """
+
+    def __init__(self, ttl: float = 3600.0, maxsize: int = 256):
+        self._replies = TTLCache(maxsize=maxsize, ttl=ttl) if ttl else None
+
+    async def generate(
+        self, generator: Callable[..., Awaitable[dict]], prompt: str
+    ) -> dict:
+        if self._replies is None:
+            return await INFLIGHT_GENERATIONS.generate(generator, prompt)
+
+        key = _generation_key(generator, prompt)
+        if (replies := self._replies.get(key)) is not None:
+            # no meta: nothing was sent to the model, so there is no usage to trace
+            return {"replies": replies}
+
+        result = await INFLIGHT_GENERATIONS.generate(generator, prompt)
+        if result.get("replies"):
+            self._replies[key] = result["replies"]
+        return result
+
+
+class SemanticCache:
+    """
+    Caches results by query embedding. A lookup returns the value stored for the
+    most similar unexpired embedding in the same namespace, provided their cosine
+    similarity reaches `threshold`. Namespaces should cover everything besides the
+    query that shapes the result (project, history, language, ...), and entries
+    expire after `ttl` seconds so results built on an old schema are not served.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        ttl: float = 3600.0,
+        maxsize_per_namespace: int = 256,
+        max_namespaces: int = 1024,
+    ):
+        self._threshold = threshold
+        self._ttl = ttl
+        self._maxsize_per_namespace = maxsize_per_namespace
+        # namespace -> (unit vectors matrix, expiry times, values)
+        self._namespaces: LRUCache = LRUCache(maxsize=max_namespaces)
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, namespace: Hashable, embedding: List[float]) -> Optional[Any]:
+        if (entries := self._namespaces.get(namespace)) is None:
+            return None
+
+        vectors, expires_at, values = entries
+        scores = vectors @ self._unit(embedding)
+        scores[expires_at <= time.monotonic()] = -np.inf
+        best = int(scores.argmax())
+        return values[best] if scores[best] >= self._threshold else None
+
+    def set(self, namespace: Hashable, embedding: List[float], value: Any) -> None:
+        now = time.monotonic()
+        vector = self._unit(embedding)[np.newaxis, :]
+        if (entries := self._namespaces.get(namespace)) is None:
+            vectors, expires_at, values = vector[:0], np.empty(0), []
+        else:
+            vectors, expires_at, values = entries
+
+        # drop expired entries and keep room for the new one
+        alive = np.flatnonzero(expires_at > now)
+        keep = alive[max(len(alive) - self._maxsize_per_namespace + 1, 0) :]
+        self._namespaces[namespace] = (
+            np.concatenate([vectors[keep], vector]),
+            np.append(expires_at[keep], now + self._ttl),
+            [values[i] for i in keep] + [value],
+        )
@@ -1,23 +1,24 @@
 import logging
-import sys
+from types import MappingProxyType
 from typing import Any, Dict
 
-import orjson
-from hamilton import base
-from hamilton.async_driver import AsyncDriver
 from haystack.components.builders.prompt_builder import PromptBuilder
 from langfuse.decorators import observe
 
-from src.core.pipeline import EnhancedBasicPipeline
+from src.core.pipeline import EnhancedBasicPipeline, get_async_driver
 from src.core.provider import LLMProvider
-from src.pipelines.common import clean_up_new_lines
+from src.pipelines.common import clean_up_new_lines, get_prompt_builder
 from src.pipelines.generation.utils.chart import (
+    CHART_DATA_PREPROCESSOR,
+    CHART_GENERATION_JSON_SCHEMA,
+    CHART_GENERATION_POST_PROCESSOR,
     ChartDataPreprocessor,
     ChartGenerationPostProcessor,
-    ChartGenerationResults,
+    PreprocessedChartData,
     chart_generation_instructions,
+    load_vega_lite_schema,
 )
-from src.utils import add_additional_properties_false, trace_cost
+from src.utils import trace_cost
 from src.web.v1.services.chart_adjustment import ChartAdjustmentOption
 
 logger = logging.getLogger("analytics-service")
@@ -146,7 +147,7 @@ Please think step by step and provide the optimal adjusted chart configuration.
 @observe(capture_input=False)
 def preprocess_data(
     data: Dict[str, Any], chart_data_preprocessor: ChartDataPreprocessor
-) -> dict:
+) -> PreprocessedChartData:
     return chart_data_preprocessor.run(data)
 
 
@@ -156,20 +157,17 @@ def prompt(
     sql: str,
     adjustment_option: ChartAdjustmentOption,
     chart_schema: dict,
-    preprocess_data: dict,
+    preprocess_data: PreprocessedChartData,
     language: str,
     prompt_builder: PromptBuilder,
 ) -> dict:
-    sample_data = preprocess_data.get("sample_data")
-    sample_column_values = preprocess_data.get("sample_column_values")
-
     _prompt = prompt_builder.run(
         query=query,
         sql=sql,
         adjustment_option=adjustment_option,
         chart_schema=chart_schema,
-        sample_data=sample_data,
-        sample_column_values=sample_column_values,
+        sample_data=preprocess_data.sample_data_json,
+        sample_column_values=preprocess_data.sample_column_values_json,
         language=language,
     )
     return {"prompt": clean_up_new_lines(_prompt.get("prompt"))}
@@ -189,26 +187,29 @@ async def generate_chart_adjustment(
 def post_process(
     generate_chart_adjustment: dict,
     vega_schema: Dict[str, Any],
-    preprocess_data: dict,
+    preprocess_data: PreprocessedChartData,
     post_processor: ChartGenerationPostProcessor,
 ) -> dict:
     return post_processor.run(
         generate_chart_adjustment.get("replies"),
         vega_schema,
-        preprocess_data["sample_data"],
+        preprocess_data.sample_data,
     )
 
 
 ## End of Pipeline
-CHART_ADJUSTMENT_MODEL_KWARGS = {
-    "response_format": {
-        "type": "json_schema",
-        "json_schema": {
-            "name": "chart_adjustment_results",
-            "schema": add_additional_properties_false(ChartGenerationResults.model_json_schema()),
-        },
+# the top level is read-only; litellm needs the nested response_format as plain dicts
+CHART_ADJUSTMENT_MODEL_KWARGS = MappingProxyType(
+    {
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "chart_adjustment_results",
+                "schema": CHART_GENERATION_JSON_SCHEMA,
+            },
+        }
     }
-}
+)
 
 
 class ChartAdjustment(EnhancedBasicPipeline):
@@ -218,27 +219,21 @@ class ChartAdjustment(EnhancedBasicPipeline):
         **kwargs,
     ):
         self._components = {
-            "prompt_builder": PromptBuilder(
-                template=chart_adjustment_user_prompt_template
-            ),
+            "prompt_builder": get_prompt_builder(chart_adjustment_user_prompt_template),
             "generator": llm_provider.get_generator(
                 system_prompt=chart_adjustment_system_prompt,
                 generation_kwargs=CHART_ADJUSTMENT_MODEL_KWARGS,
             ),
             "generator_name": llm_provider.get_model(),
-            "chart_data_preprocessor": ChartDataPreprocessor(),
-            "post_processor": ChartGenerationPostProcessor(),
+            "chart_data_preprocessor": CHART_DATA_PREPROCESSOR,
+            "post_processor": CHART_GENERATION_POST_PROCESSOR,
         }
 
-        with open("src/pipelines/generation/utils/vega-lite-schema-v5.json", "r") as f:
-            _vega_schema = orjson.loads(f.read())
-
         self._configs = {
-            "vega_schema": _vega_schema,
+            "vega_schema": load_vega_lite_schema(),
         }
-        super().__init__(
-            AsyncDriver({}, sys.modules[__name__], result_builder=base.DictResult())
-        )
+        self._base_inputs = {**self._components, **self._configs}
+        super().__init__(get_async_driver(__name__))
 
     @observe(name="Chart Adjustment")
     async def _execute(
@@ -261,8 +256,7 @@ class ChartAdjustment(EnhancedBasicPipeline):
                 "chart_schema": chart_schema,
                 "data": data,
                 "language": language,
-                **self._components,
-                **self._configs,
+                **self._base_inputs,
             },
         )
 
@@ -283,6 +277,3 @@ class ChartAdjustment(EnhancedBasicPipeline):
             data=data,
             language=language,
         )
-
-
-
@@ -1,23 +1,28 @@
 import logging
-import sys
+from types import MappingProxyType
 from typing import Any, Dict, Optional
 
-import orjson
-from hamilton import base
-from hamilton.async_driver import AsyncDriver
 from haystack.components.builders.prompt_builder import PromptBuilder
 from langfuse.decorators import observe
 
-from src.core.pipeline import EnhancedBasicPipeline
+from src.core.pipeline import EnhancedBasicPipeline, get_async_driver
 from src.core.provider import LLMProvider
-from src.pipelines.common import clean_up_new_lines
+from src.pipelines.common import (
+    INFLIGHT_GENERATIONS,
+    clean_up_new_lines,
+    get_prompt_builder,
+)
 from src.pipelines.generation.utils.chart import (
+    CHART_DATA_PREPROCESSOR,
+    CHART_GENERATION_JSON_SCHEMA,
+    CHART_GENERATION_POST_PROCESSOR,
     ChartDataPreprocessor,
     ChartGenerationPostProcessor,
-    ChartGenerationResults,
+    PreprocessedChartData,
     chart_generation_instructions,
+    load_vega_lite_schema,
 )
-from src.utils import add_additional_properties_false, trace_cost
+from src.utils import trace_cost
 
 logger = logging.getLogger("analytics-service")
 
@@ -85,14 +90,6 @@ chart_generation_user_prompt_template = """
 ### TASK ###
 Create an optimal Vega-Lite chart configuration that effectively visualizes the data to answer the user's analytical question.
 
-### ANALYTICAL CONTEXT ###
-Question: {{ query }}
-SQL: {{ sql }}
-Sample Data: {{ sample_data }}
-Sample Column Values: {{ sample_column_values }}
-Language: {{ language }}
-Custom Instruction: {{ custom_instruction }}
-
 ### CHART GENERATION GUIDELINES ###
 - **Data Analysis**: Examine the sample data to understand data types, ranges, and patterns
 - **Question Alignment**: Choose chart type that best answers the user's analytical question
@@ -111,7 +108,7 @@ Custom Instruction: {{ custom_instruction }}
 - **Response Language**: Always respond in the same language as the user's question
 - **Consistent Language**: Maintain the user's specified language throughout the response
 - **No Language Mixing**: Do not switch between languages in the same response
-- **Language Variable**: Use the specified language from the Language field above
+- **Language Variable**: Use the specified language from the Language field below
 - **Explicit Language**: The user has specified language as "{{ language }}" - respond in that language only
 - **CRITICAL**: If language is "English", respond ONLY in English. If language is "Chinese", respond ONLY in Chinese
 - **NO LANGUAGE CONFUSION**: Do not mix languages or respond in wrong language
@@ -123,6 +120,14 @@ Custom Instruction: {{ custom_instruction }}
 - **Time Series**: Use appropriate time-based visualizations for temporal data
 - **Comparisons**: Enable effective comparisons between different data segments
 
+### ANALYTICAL CONTEXT ###
+Question: {{ query }}
+SQL: {{ sql }}
+Sample Data: {{ sample_data }}
+Sample Column Values: {{ sample_column_values }}
+Language: {{ language }}
+Custom Instruction: {{ custom_instruction }}
+
 Please think step by step and create the optimal chart configuration.
 """
 
@@ -131,7 +136,7 @@ Please think step by step and create the optimal chart configuration.
 @observe(capture_input=False)
 def preprocess_data(
     data: Dict[str, Any], chart_data_preprocessor: ChartDataPreprocessor
-) -> dict:
+) -> PreprocessedChartData:
     return chart_data_preprocessor.run(data)
 
 
@@ -139,19 +144,16 @@ def preprocess_data(
 def prompt(
     query: str,
     sql: str,
-    preprocess_data: dict,
+    preprocess_data: PreprocessedChartData,
     language: str,
     custom_instruction: str,
     prompt_builder: PromptBuilder,
 ) -> dict:
-    sample_data = preprocess_data.get("sample_data")
-    sample_column_values = preprocess_data.get("sample_column_values")
-
     _prompt = prompt_builder.run(
         query=query,
         sql=sql,
-        sample_data=sample_data,
-        sample_column_values=sample_column_values,
+        sample_data=preprocess_data.sample_data_json,
+        sample_column_values=preprocess_data.sample_column_values_json,
         language=language,
         custom_instruction=custom_instruction,
     )
@@ -161,7 +163,9 @@ def prompt(
 @observe(as_type="generation", capture_input=False)
 @trace_cost
 async def generate_chart(prompt: dict, generator: Any, generator_name: str) -> dict:
-    return await generator(prompt=prompt.get("prompt")), generator_name
+    # identical chart requests that overlap in time share one LLM call
+    result = await INFLIGHT_GENERATIONS.generate(generator, prompt.get("prompt"))
+    return result, generator_name
 
 
 @observe(capture_input=False)
@@ -169,27 +173,30 @@ def post_process(
     generate_chart: dict,
     vega_schema: Dict[str, Any],
     remove_data_from_chart_schema: bool,
-    preprocess_data: dict,
+    preprocess_data: PreprocessedChartData,
     post_processor: ChartGenerationPostProcessor,
 ) -> dict:
     return post_processor.run(
         generate_chart.get("replies"),
         vega_schema,
-        preprocess_data["sample_data"],
+        preprocess_data.sample_data,
         remove_data_from_chart_schema,
     )
 
 
 ## End of Pipeline
-CHART_GENERATION_MODEL_KWARGS = {
-    "response_format": {
-        "type": "json_schema",
-        "json_schema": {
-            "name": "chart_generation_schema",
-            "schema": add_additional_properties_false(ChartGenerationResults.model_json_schema()),
-        },
+# the top level is read-only; litellm needs the nested response_format as plain dicts
+CHART_GENERATION_MODEL_KWARGS = MappingProxyType(
+    {
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "chart_generation_schema",
+                "schema": CHART_GENERATION_JSON_SCHEMA,
+            },
+        }
     }
-}
+)
 
 
 class ChartGeneration(EnhancedBasicPipeline):
@@ -199,28 +206,22 @@ class ChartGeneration(EnhancedBasicPipeline):
         **kwargs,
     ):
         self._components = {
-            "prompt_builder": PromptBuilder(
-                template=chart_generation_user_prompt_template
-            ),
+            "prompt_builder": get_prompt_builder(chart_generation_user_prompt_template),
             "generator": llm_provider.get_generator(
                 system_prompt=chart_generation_system_prompt,
                 generation_kwargs=CHART_GENERATION_MODEL_KWARGS,
             ),
             "generator_name": llm_provider.get_model(),
-            "chart_data_preprocessor": ChartDataPreprocessor(),
-            "post_processor": ChartGenerationPostProcessor(),
+            "chart_data_preprocessor": CHART_DATA_PREPROCESSOR,
+            "post_processor": CHART_GENERATION_POST_PROCESSOR,
         }
 
-        with open("src/pipelines/generation/utils/vega-lite-schema-v5.json", "r") as f:
-            _vega_schema = orjson.loads(f.read())
-
         self._configs = {
-            "vega_schema": _vega_schema,
+            "vega_schema": load_vega_lite_schema(),
         }
+        self._base_inputs = {**self._components, **self._configs}
 
-        super().__init__(
-            AsyncDriver({}, sys.modules[__name__], result_builder=base.DictResult())
-        )
+        super().__init__(get_async_driver(__name__))
 
     @observe(name="Chart Generation")
     async def _execute(
@@ -242,8 +243,7 @@ class ChartGeneration(EnhancedBasicPipeline):
                 "language": language,
                 "remove_data_from_chart_schema": remove_data_from_chart_schema,
                 "custom_instruction": custom_instruction or "",
-                **self._components,
-                **self._configs,
+                **self._base_inputs,
             },
         )
 
@@ -264,6 +264,3 @@ class ChartGeneration(EnhancedBasicPipeline):
             remove_data_from_chart_schema=remove_data_from_chart_schema,
             custom_instruction=custom_instruction,
         )
-
-
-
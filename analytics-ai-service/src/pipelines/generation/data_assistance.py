@@ -1,6 +1,6 @@
-import asyncio
 import logging
 import sys
+from operator import attrgetter
 from typing import Any, Optional
 
 from hamilton import base
@@ -10,7 +10,11 @@ from langfuse.decorators import observe
 
 from src.core.pipeline import EnhancedBasicPipeline
 from src.core.provider import LLMProvider
-from src.pipelines.common import clean_up_new_lines
+from src.pipelines.common import (
+    StreamingQueues,
+    clean_up_new_lines,
+    get_prompt_builder,
+)
 from src.utils import trace_cost
 from src.web.v1.services.ask import AskHistory
 
@@ -60,16 +64,6 @@ data_assistance_user_prompt_template = """
 ### TASK ###
 Provide clear, actionable guidance about the database schema and analytical capabilities to help users understand their data and make better analytical decisions.
 
-### DATABASE SCHEMA ###
-{% for db_schema in db_schemas %}
-    {{ db_schema }}
-{% endfor %}
-
-### USER CONTEXT ###
-User's question: {{query}}
-Language: {{language}}
-Custom Instruction: {{ custom_instruction }}
-
 ### RESPONSE GUIDELINES ###
 - **Direct Answer**: Start with a clear, direct answer to the user's question
 - **Schema Context**: Reference relevant tables, columns, and relationships
@@ -85,6 +79,14 @@ Custom Instruction: {{ custom_instruction }}
 - **Next Steps**: Suggest practical next steps for data exploration
 - **Examples**: Provide concrete examples when helpful for clarification
 
+### DATABASE SCHEMA ###
+{{ db_schemas_text }}
+
+### USER CONTEXT ###
+User's question: {{query}}
+Language: {{language}}
+Custom Instruction: {{ custom_instruction }}
+
 Please think step by step and provide comprehensive guidance.
 """
 
@@ -99,14 +101,13 @@ def prompt(
     prompt_builder: PromptBuilder,
     custom_instruction: str,
 ) -> dict:
-    previous_query_summaries = (
-        [history.question for history in histories] if histories else []
-    )
-    query = "\n".join(previous_query_summaries) + "\n" + query
+    if histories:
+        query = "\n".join(map(attrgetter("question"), histories)) + "\n" + query
 
     _prompt = prompt_builder.run(
         query=query,
-        db_schemas=db_schemas,
+        # same layout the template's former for-loop produced, joined in one pass
+        db_schemas_text="".join(f"\n    {db_schema}\n" for db_schema in db_schemas),
         language=language,
         custom_instruction=custom_instruction,
     )
@@ -133,16 +134,14 @@ class DataAssistance(EnhancedBasicPipeline):
         llm_provider: LLMProvider,
         **kwargs,
     ):
-        self._user_queues = {}
+        self._user_queues = StreamingQueues()
         self._components = {
             "generator": llm_provider.get_generator(
                 system_prompt=data_assistance_system_prompt,
                 streaming_callback=self._streaming_callback,
             ),
             "generator_name": llm_provider.get_model(),
-            "prompt_builder": PromptBuilder(
-                template=data_assistance_user_prompt_template
-            ),
+            "prompt_builder": get_prompt_builder(data_assistance_user_prompt_template),
         }
 
         super().__init__(
@@ -150,39 +149,15 @@ class DataAssistance(EnhancedBasicPipeline):
         )
 
     def _streaming_callback(self, chunk, query_id):
-        if query_id not in self._user_queues:
-            self._user_queues[
-                query_id
-            ] = asyncio.Queue()  # Create a new queue for the user if it doesn't exist
+        queue = self._user_queues.get(query_id)
         # Put the chunk content into the user's queue
-        asyncio.create_task(self._user_queues[query_id].put(chunk.content))
+        queue.put_nowait(chunk.content)
         if chunk.meta.get("finish_reason"):
-            asyncio.create_task(self._user_queues[query_id].put("<DONE>"))
+            queue.put_nowait("<DONE>")
 
     async def get_streaming_results(self, query_id):
-        async def _get_streaming_results(query_id):
-            return await self._user_queues[query_id].get()
-
-        if query_id not in self._user_queues:
-            self._user_queues[
-                query_id
-            ] = asyncio.Queue()  # Ensure the user's queue exists
-        while True:
-            try:
-                # Wait for an item from the user's queue
-                self._streaming_results = await asyncio.wait_for(
-                    _get_streaming_results(query_id), timeout=120
-                )
-                if (
-                    self._streaming_results == "<DONE>"
-                ):  # Check for end-of-stream signal
-                    del self._user_queues[query_id]
-                    break
-                if self._streaming_results:  # Check if there are results to yield
-                    yield self._streaming_results
-                    self._streaming_results = ""  # Clear after yielding
-            except TimeoutError:
-                break
+        async for chunk in self._user_queues.consume(query_id):
+            yield chunk
 
     @observe(name="Data Assistance")
     async def _execute(
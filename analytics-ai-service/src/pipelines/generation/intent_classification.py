@@ -1,9 +1,13 @@
-import ast
+import asyncio
+import hashlib
 import logging
+import re
 import sys
+from operator import attrgetter
 from typing import Any, Literal, Optional
 
 import orjson
+from cachetools import LRUCache
 from hamilton import base
 from hamilton.async_driver import AsyncDriver
 from haystack import Document
@@ -13,14 +17,32 @@ from pydantic import BaseModel
 
 from src.core.pipeline import EnhancedBasicPipeline
 from src.core.provider import DocumentStoreProvider, EmbedderProvider, LLMProvider
-from src.pipelines.common import build_table_ddl, clean_up_new_lines
+from src.pipelines.common import (
+    SemanticCache,
+    build_cached_table_ddl,
+    clean_up_new_lines,
+    construct_table_schemas,
+    get_prompt_builder,
+    parse_document_content,
+)
 from src.pipelines.generation.utils.sql import construct_instructions
-from src.utils import add_additional_properties_false, trace_cost
+from src.utils import closed_json_schema, trace_cost
 from src.web.v1.services import Configuration
 from src.web.v1.services.ask import AskHistory
 
 logger = logging.getLogger("analytics-service")
 
+# schema, samples, instructions and user guide rendered for a given retrieval
+# result; repeated and follow-up questions over the same tables reuse them
+_RENDERED_CONTEXTS = LRUCache(maxsize=128)
+
+# whole queries that are only a greeting or a thank-you; nothing to classify there
+SMALL_TALK_REGEX = re.compile(
+    r"\s*(hi|hello|hey|good (morning|afternoon|evening)|thanks|thank you|"
+    r"how are you)[\s!.?]*",
+    re.IGNORECASE,
+)
+
 
 intent_classification_system_prompt = """
 ### ROLE ###
@@ -78,7 +100,8 @@ Analyze user queries and classify them into one of four categories: `TEXT_TO_SQL
 ```
 """
 
-intent_classification_user_prompt_template = """
+# sections that only change with the retrieved context; rendered once per context
+intent_classification_context_template = """
 ### TASK ###
 Analyze the user's query and classify it into the appropriate intent category while considering the database schema, conversation history, and user guide context.
 
@@ -108,7 +131,9 @@ SQL:
 {% for doc in docs %}
 - {{doc.path}}: {{doc.content}}
 {% endfor %}
+"""
 
+intent_classification_user_prompt_template = """
 ### CONVERSATION CONTEXT ###
 {% if histories %}
 User's previous questions:
@@ -144,11 +169,8 @@ Let's think step by step and provide the classification.
 ## Start of Pipeline
 @observe(capture_input=False, capture_output=False)
 async def embedding(query: str, embedder: Any, histories: list[AskHistory]) -> dict:
-    previous_query_summaries = (
-        [history.question for history in histories] if histories else []
-    )
-
-    query = "\n".join(previous_query_summaries) + "\n" + query
+    if histories:
+        query = "\n".join(map(attrgetter("question"), histories)) + "\n" + query
 
     return await embedder.run(query)
 
@@ -182,24 +204,25 @@ async def dbschema_retrieval(
     tables = table_retrieval.get("documents", [])
     table_names = []
     for table in tables:
-        content = ast.literal_eval(table.content)
+        content = parse_document_content(table.content)
         table_names.append(content["name"])
 
     logger.info(f"dbschema_retrieval with table_names: {table_names}")
 
-    table_name_conditions = [
-        {"field": "name", "operator": "==", "value": table_name}
-        for table_name in table_names
-    ]
-
     filters = {
         "operator": "AND",
         "conditions": [
             {"field": "type", "operator": "==", "value": "TABLE_SCHEMA"},
-            {"operator": "OR", "conditions": table_name_conditions},
         ],
     }
 
+    if table_names:
+        # an empty OR never restricted the search, so the clause is only added
+        # when there are names to match
+        filters["conditions"].append(
+            {"field": "name", "operator": "in", "value": table_names}
+        )
+
     if project_id:
         filters["conditions"].append(
             {"field": "project_id", "operator": "==", "value": project_id}
@@ -213,44 +236,44 @@ async def dbschema_retrieval(
 
 @observe()
 def construct_db_schemas(dbschema_retrieval: list[Document]) -> list[str]:
-    db_schemas = {}
-    for document in dbschema_retrieval:
-        content = ast.literal_eval(document.content)
-        if content["type"] == "TABLE":
-            if document.meta["name"] not in db_schemas:
-                db_schemas[document.meta["name"]] = content
-            else:
-                db_schemas[document.meta["name"]] = {
-                    **content,
-                    "columns": db_schemas[document.meta["name"]].get("columns", []),
-                }
-        elif content["type"] == "TABLE_COLUMNS":
-            if document.meta["name"] not in db_schemas:
-                db_schemas[document.meta["name"]] = {"columns": content["columns"]}
-            else:
-                if "columns" not in db_schemas[document.meta["name"]]:
-                    db_schemas[document.meta["name"]]["columns"] = content["columns"]
-                else:
-                    db_schemas[document.meta["name"]]["columns"] += content["columns"]
-
-    # remove incomplete schemas
-    db_schemas = {k: v for k, v in db_schemas.items() if "type" in v and "columns" in v}
-
     db_schemas_in_ddl = []
-    for table_schema in list(db_schemas.values()):
+    for table_schema in construct_table_schemas(dbschema_retrieval):
         if table_schema["type"] == "TABLE":
-            ddl, _, _ = build_table_ddl(table_schema)
+            ddl, _, _ = build_cached_table_ddl(table_schema)
             db_schemas_in_ddl.append(ddl)
 
     return db_schemas_in_ddl
 
 
+def _render_context(
+    context_prompt_builder: PromptBuilder,
+    db_schemas: list[str],
+    sql_samples: Optional[list[dict]],
+    instructions: list[str],
+    docs: list[dict],
+) -> str:
+    key = hashlib.blake2b(
+        orjson.dumps([db_schemas, sql_samples, instructions, docs], default=str),
+        digest_size=16,
+    ).digest()
+    if (context := _RENDERED_CONTEXTS.get(key)) is None:
+        context = context_prompt_builder.run(
+            db_schemas=db_schemas,
+            sql_samples=sql_samples,
+            instructions=instructions,
+            docs=docs,
+        )["prompt"]
+        _RENDERED_CONTEXTS[key] = context
+    return context
+
+
 @observe(capture_input=False)
 def prompt(
     query: str,
     analytics_docs: list[dict],
     construct_db_schemas: list[str],
     histories: list[AskHistory],
+    context_prompt_builder: PromptBuilder,
     prompt_builder: PromptBuilder,
     sql_samples: Optional[list[dict]] = None,
     instructions: Optional[list[dict]] = None,
@@ -263,24 +286,41 @@ def prompt(
         # Convert dict to Configuration object
         configuration = Configuration(**configuration)
 
-    _prompt = prompt_builder.run(
-        query=query,
-        language=configuration.language,
+    context = _render_context(
+        context_prompt_builder,
         db_schemas=construct_db_schemas,
-        histories=histories,
         sql_samples=sql_samples,
         instructions=construct_instructions(
             instructions=instructions,
         ),
         docs=analytics_docs,
     )
-    return {"prompt": clean_up_new_lines(_prompt.get("prompt"))}
+    _prompt = prompt_builder.run(
+        query=query,
+        language=configuration.language,
+        histories=histories,
+    )
+    return {"prompt": clean_up_new_lines(context + "\n" + _prompt.get("prompt"))}
 
 
 @observe(as_type="generation", capture_input=False)
 @trace_cost
-async def classify_intent(prompt: dict, generator: Any, generator_name: str) -> dict:
-    return await generator(prompt=prompt.get("prompt")), generator_name
+async def classify_intent(
+    prompt: dict,
+    generator: Any,
+    generator_name: str,
+    classification_timeout: Optional[float],
+) -> dict:
+    try:
+        return await asyncio.wait_for(
+            generator(prompt=prompt.get("prompt")), timeout=classification_timeout
+        ), generator_name
+    except TimeoutError:
+        # no replies: post_process falls back to TEXT_TO_SQL, which is never cached
+        logger.warning(
+            f"Intent classification timed out after {classification_timeout}s"
+        )
+        return {"replies": []}, generator_name
 
 
 @observe(capture_input=False)
@@ -293,7 +333,8 @@ def post_process(classify_intent: dict, construct_db_schemas: list[str]) -> dict
             "reasoning": results["reasoning"],
             "db_schemas": construct_db_schemas,
         }
-    except Exception:
+    except (orjson.JSONDecodeError, KeyError, IndexError, TypeError):
+        # malformed, truncated or missing reply
         return {
             "rephrased_question": "",
             "intent": "TEXT_TO_SQL",
@@ -305,6 +346,37 @@ def post_process(classify_intent: dict, construct_db_schemas: list[str]) -> dict
 ## End of Pipeline
 
 
+def _semantic_cache_namespace(
+    project_id: Optional[str],
+    histories: Optional[list[AskHistory]],
+    sql_samples: Optional[list[dict]],
+    instructions: Optional[list[dict]],
+    language: str,
+) -> bytes:
+    # everything besides the query that goes into the prompt
+    return hashlib.blake2b(
+        orjson.dumps(
+            [
+                project_id or "",
+                [(history.question, history.sql) for history in histories or []],
+                sql_samples or [],
+                instructions or [],
+                language,
+            ],
+            default=str,
+        ),
+        digest_size=16,
+    ).digest()
+
+
+def _from_semantic_cache(cached: dict, query: str) -> dict:
+    result = {key: value for key, value in cached.items() if key != "query"}
+    if cached["query"] != query:
+        # the rephrasing belongs to the cached question; let callers use their own
+        result["rephrased_question"] = ""
+    return result
+
+
 class IntentClassificationResult(BaseModel):
     rephrased_question: str
     results: Literal["MISLEADING_QUERY", "TEXT_TO_SQL", "GENERAL", "USER_GUIDE"]
@@ -316,7 +388,7 @@ INTENT_CLASSIFICAION_MODEL_KWARGS = {
         "type": "json_schema",
         "json_schema": {
             "name": "intent_classification",
-            "schema": add_additional_properties_false(IntentClassificationResult.model_json_schema()),
+            "schema": closed_json_schema(IntentClassificationResult),
         },
     }
 }
@@ -331,8 +403,16 @@ class IntentClassification(EnhancedBasicPipeline):
         analytics_docs: list[dict],
         table_retrieval_size: Optional[int] = 50,
         table_column_retrieval_size: Optional[int] = 100,
+        semantic_cache_threshold: Optional[float] = None,
+        timeout: Optional[float] = 15.0,
         **kwargs,
     ):
+        # None disables the cache; every query is classified by the LLM
+        self._semantic_cache = (
+            SemanticCache(threshold=semantic_cache_threshold)
+            if semantic_cache_threshold is not None
+            else None
+        )
         self._components = {
             "embedder": embedder_provider.get_text_embedder(),
             "table_retriever": document_store_provider.get_retriever(
@@ -348,14 +428,20 @@ class IntentClassification(EnhancedBasicPipeline):
                 generation_kwargs=INTENT_CLASSIFICAION_MODEL_KWARGS,
             ),
             "generator_name": llm_provider.get_model(),
-            "prompt_builder": PromptBuilder(
-                template=intent_classification_user_prompt_template
+            "context_prompt_builder": get_prompt_builder(
+                intent_classification_context_template
+            ),
+            "prompt_builder": get_prompt_builder(
+                intent_classification_user_prompt_template
             ),
         }
 
         self._configs = {
             "analytics_docs": analytics_docs,
+            # None waits for the model however long it takes
+            "classification_timeout": timeout,
         }
+        self._base_inputs = {**self._components, **self._configs}
 
         super().__init__(
             AsyncDriver({}, sys.modules[__name__], result_builder=base.DictResult())
@@ -375,19 +461,72 @@ class IntentClassification(EnhancedBasicPipeline):
         if isinstance(configuration, dict):
             configuration = Configuration(**configuration)
         logger.info("Intent Classification pipeline is running...")
-        return await self._pipe.execute(
-            ["post_process"],
+        if SMALL_TALK_REGEX.fullmatch(query):
+            return await self._small_talk(query, project_id, histories)
+
+        inputs = {
+            "query": query,
+            "project_id": project_id or "",
+            "histories": histories or [],
+            "sql_samples": sql_samples or [],
+            "instructions": instructions or [],
+            "configuration": configuration,
+            **self._base_inputs,
+        }
+        if self._semantic_cache is None:
+            return await self._pipe.execute(["post_process"], inputs=inputs)
+
+        embedding = (await self._pipe.execute(["embedding"], inputs=inputs))[
+            "embedding"
+        ]
+        namespace = _semantic_cache_namespace(
+            project_id, histories, sql_samples, instructions, configuration.language
+        )
+        if (
+            cached := self._semantic_cache.get(namespace, embedding.get("embedding"))
+        ) is not None:
+            logger.info("Intent Classification semantic cache hit")
+            return {"post_process": _from_semantic_cache(cached, query)}
+
+        result = await self._pipe.execute(
+            ["post_process"], inputs=inputs, overrides={"embedding": embedding}
+        )
+        # an empty reasoning marks post_process's fallback result, never cache it
+        if result["post_process"]["reasoning"]:
+            self._semantic_cache.set(
+                namespace,
+                embedding.get("embedding"),
+                {**result["post_process"], "query": query},
+            )
+        return result
+
+    async def _small_talk(
+        self,
+        query: str,
+        project_id: Optional[str],
+        histories: Optional[list[AskHistory]],
+    ) -> dict:
+        # the schemas are still retrieved, misleading assistance suggests questions
+        # from them; only the LLM classification is skipped
+        result = await self._pipe.execute(
+            ["construct_db_schemas"],
             inputs={
                 "query": query,
                 "project_id": project_id or "",
                 "histories": histories or [],
-                "sql_samples": sql_samples or [],
-                "instructions": instructions or [],
-                "configuration": configuration,
-                **self._components,
-                **self._configs,
+                **self._base_inputs,
             },
         )
+        # the reasoning is shown to the user and must be in their language, so it is
+        # left empty like post_process's fallback; the query needs no rephrasing
+        return {
+            "post_process": {
+                "rephrased_question": query,
+                "intent": "MISLEADING_QUERY",
+                "reasoning": "",
+                "db_schemas": result["construct_db_schemas"],
+            }
+        }
 
     async def run(
         self,
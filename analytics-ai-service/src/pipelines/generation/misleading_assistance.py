@@ -1,6 +1,6 @@
-import asyncio
 import logging
 import sys
+from operator import attrgetter
 from typing import Any, Optional
 
 from hamilton import base
@@ -10,7 +10,11 @@ from langfuse.decorators import observe
 
 from src.core.pipeline import EnhancedBasicPipeline
 from src.core.provider import LLMProvider
-from src.pipelines.common import clean_up_new_lines
+from src.pipelines.common import (
+    StreamingQueues,
+    clean_up_new_lines,
+    get_prompt_builder,
+)
 from src.utils import trace_cost
 from src.web.v1.services.ask import AskHistory
 
@@ -112,10 +116,8 @@ def prompt(
     prompt_builder: PromptBuilder,
     custom_instruction: str,
 ) -> dict:
-    previous_query_summaries = (
-        [history.question for history in histories] if histories else []
-    )
-    query = "\n".join(previous_query_summaries) + "\n" + query
+    if histories:
+        query = "\n".join(map(attrgetter("question"), histories)) + "\n" + query
 
     _prompt = prompt_builder.run(
         query=query,
@@ -146,15 +148,15 @@ class MisleadingAssistance(EnhancedBasicPipeline):
         llm_provider: LLMProvider,
         **kwargs,
     ):
-        self._user_queues = {}
+        self._user_queues = StreamingQueues()
         self._components = {
             "generator": llm_provider.get_generator(
                 system_prompt=misleading_assistance_system_prompt,
                 streaming_callback=self._streaming_callback,
             ),
             "generator_name": llm_provider.get_model(),
-            "prompt_builder": PromptBuilder(
-                template=misleading_assistance_user_prompt_template
+            "prompt_builder": get_prompt_builder(
+                misleading_assistance_user_prompt_template
             ),
         }
 
@@ -163,39 +165,15 @@ class MisleadingAssistance(EnhancedBasicPipeline):
         )
 
     def _streaming_callback(self, chunk, query_id):
-        if query_id not in self._user_queues:
-            self._user_queues[
-                query_id
-            ] = asyncio.Queue()  # Create a new queue for the user if it doesn't exist
+        queue = self._user_queues.get(query_id)
         # Put the chunk content into the user's queue
-        asyncio.create_task(self._user_queues[query_id].put(chunk.content))
+        queue.put_nowait(chunk.content)
         if chunk.meta.get("finish_reason"):
-            asyncio.create_task(self._user_queues[query_id].put("<DONE>"))
+            queue.put_nowait("<DONE>")
 
     async def get_streaming_results(self, query_id):
-        async def _get_streaming_results(query_id):
-            return await self._user_queues[query_id].get()
-
-        if query_id not in self._user_queues:
-            self._user_queues[
-                query_id
-            ] = asyncio.Queue()  # Ensure the user's queue exists
-        while True:
-            try:
-                # Wait for an item from the user's queue
-                self._streaming_results = await asyncio.wait_for(
-                    _get_streaming_results(query_id), timeout=120
-                )
-                if (
-                    self._streaming_results == "<DONE>"
-                ):  # Check for end-of-stream signal
-                    del self._user_queues[query_id]
-                    break
-                if self._streaming_results:  # Check if there are results to yield
-                    yield self._streaming_results
-                    self._streaming_results = ""  # Clear after yielding
-            except TimeoutError:
-                break
+        async for chunk in self._user_queues.consume(query_id):
+            yield chunk
 
     @observe(name="Misleading Assistance")
     async def _execute(
@@ -1,18 +1,20 @@
 import logging
-import sys
 from typing import Any
 
 import orjson
-from hamilton import base
-from hamilton.async_driver import AsyncDriver
 from haystack.components.builders.prompt_builder import PromptBuilder
-from langfuse.decorators import observe
 from pydantic import BaseModel
 
-from src.core.pipeline import EnhancedBasicPipeline
+from src.core.pipeline import EnhancedBasicPipeline, get_async_driver
 from src.core.provider import LLMProvider
-from src.pipelines.common import clean_up_new_lines
-from src.utils import add_additional_properties_false, trace_cost
+from src.pipelines.common import (
+    INFLIGHT_GENERATIONS,
+    clean_up_new_lines,
+    compact_prompt,
+    get_prompt_builder,
+    parse_json_reply,
+)
+from src.utils import closed_json_schema, observe_if_enabled, trace_cost
 
 logger = logging.getLogger("analytics-service")
 
@@ -154,9 +156,12 @@ If the data model is unclear or limited, generate general analytical questions t
 Please generate the requested questions following these guidelines.
 """
 
+system_prompt = compact_prompt(system_prompt)
+user_prompt_template = compact_prompt(user_prompt_template)
+
 
 ## Start of Pipeline
-@observe(capture_input=False)
+@observe_if_enabled(capture_input=False)
 def prompt(
     previous_questions: list[str],
     documents: list,
@@ -181,100 +186,80 @@ def prompt(
     return {"prompt": clean_up_new_lines(_prompt.get("prompt"))}
 
 
-@observe(as_type="generation", capture_input=False)
+@observe_if_enabled(as_type="generation", capture_input=False)
 @trace_cost
 async def generate(prompt: dict, generator: Any, generator_name: str) -> dict:
-    return await generator(prompt=prompt.get("prompt")), generator_name
+    # recommendations for the same MDL are often requested several times at once
+    # (e.g. the modeling page and the home page loading together); they share one
+    # LLM call
+    result = await INFLIGHT_GENERATIONS.generate(generator, prompt.get("prompt"))
+    return result, generator_name
+
+
+_TOP_CATEGORIES = {
+    "question": "What are the top performing categories by revenue?",
+    "category": "Descriptive Questions",
+}
+_CHANGE_OVER_TIME = {
+    "question": "How has performance changed over time?",
+    "category": "Comparative Questions",
+}
+_HIGHEST_GROWTH = {
+    "question": "Which segments show the highest growth?",
+    "category": "Segmentation Questions",
+}
+_KEY_TRENDS = {
+    "question": "What are the key trends in the data?",
+    "category": "Descriptive Questions",
+}
+_SUCCESS_FACTORS = {
+    "question": "Which factors contribute most to success?",
+    "category": "Data Quality/Accuracy Questions",
+}
 
+# fallback results are only read downstream, so each one is built once and shared
+_FALLBACK_FULL = {
+    "questions": (
+        _TOP_CATEGORIES,
+        _CHANGE_OVER_TIME,
+        _HIGHEST_GROWTH,
+        _KEY_TRENDS,
+        _SUCCESS_FACTORS,
+    )
+}
+_FALLBACK_JSON_ERR = {
+    "questions": (_TOP_CATEGORIES, _CHANGE_OVER_TIME, _HIGHEST_GROWTH)
+}
+_FALLBACK_NO_REPLIES = {"questions": (_TOP_CATEGORIES, _CHANGE_OVER_TIME)}
+_FALLBACK_GENERIC = {"questions": (_KEY_TRENDS, _SUCCESS_FACTORS)}
 
-@observe(capture_input=False)
+
+@observe_if_enabled(capture_input=False)
 def normalized(generate: dict) -> dict:
     def wrapper(text: str) -> list:
-        text = text.replace("\n", " ")
-        text = " ".join(text.split())
         try:
-            text_list = orjson.loads(text.strip())
+            text_list = parse_json_reply(text)
 
             # If no questions generated, provide fallback questions
             if not text_list or not text_list.get("questions", []):
                 logger.warning("No questions generated, providing fallback questions")
-                return {
-                    "questions": [
-                        {
-                            "question": "What are the top performing categories by revenue?",
-                            "category": "Descriptive Questions",
-                        },
-                        {
-                            "question": "How has performance changed over time?",
-                            "category": "Comparative Questions",
-                        },
-                        {
-                            "question": "Which segments show the highest growth?",
-                            "category": "Segmentation Questions",
-                        },
-                        {
-                            "question": "What are the key trends in the data?",
-                            "category": "Descriptive Questions",
-                        },
-                        {
-                            "question": "Which factors contribute most to success?",
-                            "category": "Data Quality/Accuracy Questions",
-                        },
-                    ]
-                }
+                return _FALLBACK_FULL
 
             return text_list
         except orjson.JSONDecodeError as e:
             logger.error(f"Error decoding JSON: {e}")
             # Return fallback questions on JSON error
-            return {
-                "questions": [
-                    {
-                        "question": "What are the top performing categories by revenue?",
-                        "category": "Descriptive Questions",
-                    },
-                    {
-                        "question": "How has performance changed over time?",
-                        "category": "Comparative Questions",
-                    },
-                    {
-                        "question": "Which segments show the highest growth?",
-                        "category": "Segmentation Questions",
-                    },
-                ]
-            }
+            return _FALLBACK_JSON_ERR
         except Exception as e:
             logger.error(f"Unexpected error in question generation: {e}")
             # Return fallback questions on any error
-            return {
-                "questions": [
-                    {
-                        "question": "What are the key trends in the data?",
-                        "category": "Descriptive Questions",
-                    },
-                    {
-                        "question": "Which factors contribute most to success?",
-                        "category": "Data Quality/Accuracy Questions",
-                    },
-                ]
-            }
+            return _FALLBACK_GENERIC
 
     try:
         replies = generate.get("replies", [])
         if not replies:
             logger.warning("No replies generated, providing fallback questions")
-            return {
-                "questions": [
-                    {
-                        "question": "What are the top performing categories by revenue?",
-                        "category": "Descriptive Questions",
-                    },
-                    {
-                        "question": "How has performance changed over time?",
-                        "category": "Comparative Questions",
-                    },
-                ]
-            }
+            return _FALLBACK_NO_REPLIES
 
         reply = replies[0]  # Expecting only one reply
         normalized = wrapper(reply)
@@ -282,18 +267,7 @@ def normalized(generate: dict) -> dict:
     except Exception as e:
         logger.error(f"Error processing question generation: {e}")
         # Return fallback questions on any error
-        return {
-            "questions": [
-                {
-                    "question": "What are the key trends in the data?",
-                    "category": "Descriptive Questions",
-                },
-                {
-                    "question": "Which factors contribute most to success?",
-                    "category": "Data Quality/Accuracy Questions",
-                },
-            ]
-        }
+        return _FALLBACK_GENERIC
 
 
 ## End of Pipeline
@@ -311,7 +285,7 @@ QUESTION_RECOMMENDATION_MODEL_KWARGS = {
         "type": "json_schema",
         "json_schema": {
             "name": "question_recommendation",
-            "schema": add_additional_properties_false(QuestionResult.model_json_schema()),
+            "schema": closed_json_schema(QuestionResult),
         },
     }
 }
@@ -324,7 +298,7 @@ class QuestionRecommendation(EnhancedBasicPipeline):
         **_,
     ):
         self._components = {
-            "prompt_builder": PromptBuilder(template=user_prompt_template),
+            "prompt_builder": get_prompt_builder(user_prompt_template),
             "generator": llm_provider.get_generator(
                 system_prompt=system_prompt,
                 generation_kwargs=QUESTION_RECOMMENDATION_MODEL_KWARGS,
@@ -334,11 +308,9 @@ class QuestionRecommendation(EnhancedBasicPipeline):
 
         self._final = "normalized"
 
-        super().__init__(
-            AsyncDriver({}, sys.modules[__name__], result_builder=base.DictResult())
-        )
+        super().__init__(get_async_driver(__name__))
 
-    @observe(name="Question Recommendation")
+    @observe_if_enabled(name="Question Recommendation")
     async def _execute(
         self,
         contexts: list[str],
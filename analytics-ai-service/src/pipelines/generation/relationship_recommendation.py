@@ -1,19 +1,22 @@
 import logging
-import sys
 from enum import Enum
+from operator import itemgetter
 from typing import Any
 
 import orjson
-from hamilton import base
-from hamilton.async_driver import AsyncDriver
 from haystack.components.builders.prompt_builder import PromptBuilder
-from langfuse.decorators import observe
 from pydantic import BaseModel
 
-from src.core.pipeline import EnhancedBasicPipeline
+from src.core.pipeline import EnhancedBasicPipeline, get_async_driver
 from src.core.provider import LLMProvider
-from src.pipelines.common import clean_up_new_lines
-from src.utils import add_additional_properties_false, trace_cost
+from src.pipelines.common import (
+    GenerationCache,
+    clean_up_new_lines,
+    compact_prompt,
+    get_prompt_builder,
+    parse_json_reply,
+)
+from src.utils import closed_json_schema, observe_if_enabled, trace_cost
 
 logger = logging.getLogger("analytics-service")
 
@@ -122,58 +125,74 @@ Analyze the provided data model and recommend meaningful relationships that impr
 Please analyze the models and provide relationship recommendations.
 """
 
+system_prompt = compact_prompt(system_prompt)
+user_prompt_template = compact_prompt(user_prompt_template)
+
 
 ## Start of Pipeline
-@observe(capture_input=False)
+@observe_if_enabled(capture_input=False)
 def cleaned_models(mdl: dict) -> dict:
     def remove_display_name(d: dict) -> dict:
-        if "properties" in d and isinstance(d["properties"], dict):
-            d["properties"] = d["properties"].copy()
-            d["properties"].pop("displayName", None)
+        # mdl is only read, so a dict is copied only when it has a displayName
+        properties = d.get("properties")
+        if isinstance(properties, dict) and "displayName" in properties:
+            return {
+                **d,
+                "properties": {
+                    key: value
+                    for key, value in properties.items()
+                    if key != "displayName"
+                },
+            }
         return d
 
-    def column_filter(columns: list[dict]) -> list[dict]:
-        filtered_columns = []
-        for column in columns:
-            if "relationship" not in column:
-                # Create a copy of the column to avoid modifying the original
-                filtered_column = column.copy()
-                filtered_column = remove_display_name(filtered_column)
-                filtered_columns.append(filtered_column)
-        return filtered_columns
-
     return [
         remove_display_name(
-            {**model, "columns": column_filter(model.get("columns", []))}
+            {
+                **model,
+                "columns": [
+                    remove_display_name(column)
+                    for column in model.get("columns", [])
+                    if "relationship" not in column
+                ],
+            }
         )
         for model in mdl.get("models", [])
     ]
 
 
-@observe(capture_input=False)
+@observe_if_enabled(capture_input=False)
 def prompt(
     cleaned_models: dict,
     prompt_builder: PromptBuilder,
     language: str,
 ) -> dict:
-    _prompt = prompt_builder.run(models=cleaned_models, language=language)
+    # the models come from the MDL JSON; serializing them in orjson is cheaper than
+    # Jinja printing the nested dicts, and JSON is what the model reads best
+    _prompt = prompt_builder.run(
+        models=orjson.dumps(cleaned_models).decode(), language=language
+    )
     return {"prompt": clean_up_new_lines(_prompt.get("prompt"))}
 
 
-@observe(as_type="generation", capture_input=False)
+@observe_if_enabled(as_type="generation", capture_input=False)
 @trace_cost
-async def generate(prompt: dict, generator: Any, generator_name: str) -> dict:
-    return await generator(prompt=prompt.get("prompt")), generator_name
+async def generate(
+    prompt: dict,
+    generator: Any,
+    generator_name: str,
+    generation_cache: GenerationCache,
+) -> dict:
+    result = await generation_cache.generate(generator, prompt.get("prompt"))
+    return result, generator_name
 
 
-@observe(capture_input=False)
+@observe_if_enabled(capture_input=False)
 def normalized(generate: dict) -> dict:
     def wrapper(text: str) -> str:
-        text = text.replace("\n", " ")
-        text = " ".join(text.split())
-        # Convert the normalized text to a dictionary
+        # Convert the text to a dictionary
         try:
-            text_dict = orjson.loads(text.strip())
+            text_dict = parse_json_reply(text)
             return text_dict
         except orjson.JSONDecodeError as e:
             logger.error(f"Error decoding JSON: {e}")
@@ -185,31 +204,42 @@ def normalized(generate: dict) -> dict:
     return normalized
 
 
-@observe(capture_input=False)
+@observe_if_enabled(capture_input=False)
 def validated(normalized: dict, mdl: dict) -> dict:
+    # nothing to check, e.g. the reply was not valid JSON: skip building the index
+    relationships = normalized.get("relationships")
+    if not relationships or not mdl.get("models"):
+        return {"relationships": []}
+
     model_columns = {
-        model["name"]: set(
-            [
-                column["name"]
-                for column in model.get("columns", [])
-                if not column.get("relationship")
-            ]
+        model["name"]: frozenset(
+            column["name"]
+            for column in model.get("columns", [])
+            if not column.get("relationship")
         )
         for model in mdl.get("models", [])
     }
 
-    relationships = normalized.get("relationships", [])
-    validated_relationships = [
-        relationship
-        for relationship in relationships
-        if RelationType.is_include(relationship.get("type"))
-        and relationship.get("fromModel") in model_columns
-        and relationship.get("toModel") in model_columns
-        and relationship.get("fromColumn")
-        in model_columns.get(relationship.get("fromModel"))
-        and relationship.get("toColumn")
-        in model_columns.get(relationship.get("toModel"))
-    ]
+    validated_relationships = []
+    for relationship in relationships:
+        try:
+            relation_type, from_model, from_column, to_model, to_column = (
+                _RELATIONSHIP_FIELDS(relationship)
+            )
+        except (KeyError, TypeError):
+            # a malformed entry is dropped like any other invalid relationship
+            continue
+
+        if relation_type not in _RELATION_TYPE_VALUES:
+            continue
+
+        from_columns = model_columns.get(from_model)
+        to_columns = model_columns.get(to_model)
+        if from_columns is None or to_columns is None:
+            continue
+
+        if from_column in from_columns and to_column in to_columns:
+            validated_relationships.append(relationship)
 
     return {"relationships": validated_relationships}
 
@@ -222,7 +252,13 @@ class RelationType(Enum):
 
     @classmethod
     def is_include(cls, value: str) -> bool:
-        return value in cls._value2member_map_
+        return value in _RELATION_TYPE_VALUES
+
+
+_RELATION_TYPE_VALUES = frozenset(relation_type.value for relation_type in RelationType)
+_RELATIONSHIP_FIELDS = itemgetter(
+    "type", "fromModel", "fromColumn", "toModel", "toColumn"
+)
 
 
 class ModelRelationship(BaseModel):
@@ -244,7 +280,7 @@ RELATIONSHIP_RECOMMENDATION_MODEL_KWARGS = {
         "type": "json_schema",
         "json_schema": {
             "name": "semantic_description",
-            "schema": add_additional_properties_false(RelationshipResult.model_json_schema()),
+            "schema": closed_json_schema(RelationshipResult),
         },
     }
 }
@@ -254,24 +290,26 @@ class RelationshipRecommendation(EnhancedBasicPipeline):
     def __init__(
         self,
         llm_provider: LLMProvider,
+        generation_cache_ttl: int = 3600,
         **_,
     ):
         self._components = {
-            "prompt_builder": PromptBuilder(template=user_prompt_template),
+            "prompt_builder": get_prompt_builder(user_prompt_template),
             "generator": llm_provider.get_generator(
                 system_prompt=system_prompt,
                 generation_kwargs=RELATIONSHIP_RECOMMENDATION_MODEL_KWARGS,
             ),
             "generator_name": llm_provider.get_model(),
+            # the same MDL is often sent again while a project is being modeled; an
+            # identical prompt reuses the earlier recommendation
+            "generation_cache": GenerationCache(ttl=generation_cache_ttl),
         }
 
         self._final = "validated"
 
-        super().__init__(
-            AsyncDriver({}, sys.modules[__name__], result_builder=base.DictResult())
-        )
+        super().__init__(get_async_driver(__name__))
 
-    @observe(name="Relationship Recommendation")
+    @observe_if_enabled(name="Relationship Recommendation")
     async def _execute(
         self,
         mdl: dict,
@@ -11,7 +11,12 @@ from pydantic import BaseModel
 
 from src.core.pipeline import EnhancedBasicPipeline
 from src.core.provider import LLMProvider
-from src.pipelines.common import clean_up_new_lines
+from src.pipelines.common import (
+    GenerationCache,
+    clean_up_new_lines,
+    get_prompt_builder,
+    parse_json_reply,
+)
 from src.pipelines.indexing import clean_display_name
 from src.utils import add_additional_properties_false, trace_cost
 
@@ -80,11 +85,6 @@ user_prompt_template = """
 ### TASK ###
 Generate comprehensive, business-focused descriptions for data models and their columns based on user-provided context and requirements, ensuring descriptions are practical and actionable.
 
-### USER CONTEXT ###
-User's prompt: {{ user_prompt }}
-Picked models: {{ picked_models }}
-Localization Language: {{ language }}
-
 ### DESCRIPTION REQUIREMENTS ###
 - **Business Context**: Focus on business value and practical usage rather than technical details
 - **Clarity and Conciseness**: Write descriptions that are clear, informative, and easy to understand
@@ -113,6 +113,11 @@ Localization Language: {{ language }}
 - **Consistency**: Use consistent terminology and formatting across all descriptions
 - **Localization**: Adapt language and examples to the user's specified locale
 
+### USER CONTEXT ###
+User's prompt: {{ user_prompt }}
+Picked models: {{ picked_models }}
+Localization Language: {{ language }}
+
 Please provide comprehensive descriptions for the model and each column.
 """
 
@@ -120,39 +125,31 @@ Please provide comprehensive descriptions for the model and each column.
 ## Start of Pipeline
 @observe(capture_input=False)
 def picked_models(mdl: dict, selected_models: list[str]) -> list[dict]:
-    def relation_filter(column: dict) -> bool:
-        return "relationship" not in column
-
-    def column_formatter(columns: list[dict]) -> list[dict]:
-        return [
-            {
-                "name": column["name"],
-                "type": column["type"],
-                "properties": {
-                    "description": column["properties"].get("description", ""),
-                    "alias": clean_display_name(
-                        column["properties"].get("displayName", "")
-                    ),
-                },
-            }
-            for column in columns
-            if relation_filter(column)
-        ]
-
-    def extract(model: dict) -> dict:
+    selected = frozenset(selected_models)
+
+    def properties(item: dict) -> dict:
+        _properties = item["properties"]
         return {
-            "name": model["name"],
-            "columns": column_formatter(model["columns"]),
-            "properties": {
-                "description": model["properties"].get("description", ""),
-                "alias": clean_display_name(model["properties"].get("displayName", "")),
-            },
+            "description": _properties.get("description", ""),
+            "alias": clean_display_name(_properties.get("displayName", "")),
         }
 
     return [
-        extract(model)
+        {
+            "name": model["name"],
+            "columns": [
+                {
+                    "name": column["name"],
+                    "type": column["type"],
+                    "properties": properties(column),
+                }
+                for column in model["columns"]
+                if "relationship" not in column
+            ],
+            "properties": properties(model),
+        }
         for model in mdl.get("models", [])
-        if model.get("name", "") in selected_models
+        if model.get("name", "") in selected
     ]
 
 
@@ -163,8 +160,9 @@ def prompt(
     prompt_builder: PromptBuilder,
     language: str,
 ) -> dict:
+    # output still filters on the picked_models dicts, so only the prompt gets JSON
     _prompt = prompt_builder.run(
-        picked_models=picked_models,
+        picked_models=orjson.dumps(picked_models).decode(),
         user_prompt=user_prompt,
         language=language,
     )
@@ -173,19 +171,21 @@ def prompt(
 
 @observe(as_type="generation", capture_input=False)
 @trace_cost
-async def generate(prompt: dict, generator: Any, generator_name: str) -> dict:
-    return await generator(prompt=prompt.get("prompt")), generator_name
+async def generate(
+    prompt: dict,
+    generator: Any,
+    generator_name: str,
+    generation_cache: GenerationCache,
+) -> dict:
+    result = await generation_cache.generate(generator, prompt.get("prompt"))
+    return result, generator_name
 
 
 @observe(capture_input=False)
 def normalize(generate: dict) -> dict:
     def wrapper(text: str) -> str:
-        text = text.replace("\n", " ")
-        text = " ".join(text.split())
-        # Convert the normalized text to a dictionary
         try:
-            text_dict = orjson.loads(text.strip())
-            return text_dict
+            return parse_json_reply(text)
         except orjson.JSONDecodeError as e:
             logger.error(f"Error decoding JSON: {e}")
             return {"models": []}  # Return an empty list if JSON decoding fails
@@ -198,8 +198,11 @@ def normalize(generate: dict) -> dict:
 
 @observe(capture_input=False)
 def output(normalize: dict, picked_models: list[dict]) -> dict:
+    if not normalize:
+        return {}
+
     def _filter(enriched: list[dict], columns: list[dict]) -> list[dict]:
-        valid_columns = [col["name"] for col in columns]
+        valid_columns = frozenset(col["name"] for col in columns)
 
         return [col for col in enriched if col["name"] in valid_columns]
 
@@ -244,14 +247,23 @@ SEMANTICS_DESCRIPTION_MODEL_KWARGS = {
 
 
 class SemanticsDescription(EnhancedBasicPipeline):
-    def __init__(self, llm_provider: LLMProvider, **_):
+    def __init__(
+        self,
+        llm_provider: LLMProvider,
+        generation_cache_ttl: int = 3600,
+        **_,
+    ):
         self._components = {
-            "prompt_builder": PromptBuilder(template=user_prompt_template),
+            "prompt_builder": get_prompt_builder(user_prompt_template),
             "generator": llm_provider.get_generator(
                 system_prompt=system_prompt,
                 generation_kwargs=SEMANTICS_DESCRIPTION_MODEL_KWARGS,
             ),
             "generator_name": llm_provider.get_model(),
+            # the prompt covers the user prompt, the picked models and the language,
+            # so an identical prompt (e.g. the same models described again) reuses
+            # the earlier reply
+            "generation_cache": GenerationCache(ttl=generation_cache_ttl),
         }
         self._final = "output"
 
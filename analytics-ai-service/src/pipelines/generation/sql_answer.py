@@ -1,4 +1,5 @@
-import asyncio
+import csv
+import io
 import logging
 import sys
 from typing import Any, Optional
@@ -10,7 +11,11 @@ from langfuse.decorators import observe
 
 from src.core.pipeline import EnhancedBasicPipeline
 from src.core.provider import LLMProvider
-from src.pipelines.common import clean_up_new_lines
+from src.pipelines.common import (
+    StreamingQueues,
+    clean_up_new_lines,
+    get_prompt_builder,
+)
 from src.utils import trace_cost
 from src.web.v1.services import Configuration
 
@@ -35,8 +40,8 @@ Transform SQL query results into natural language answers that are easy to under
 - **Consistent Language**: Maintain the user's specified language throughout the response
 - **No Language Mixing**: Do not switch between languages in the same response
 - **Language Detection**: Detect the user's language from their question and respond accordingly
-- **Language Variable**: Use the specified language from the Language field above
-- **Explicit Language**: The user has specified language as "{{ language }}" - respond in that language only
+- **Language Variable**: Use the specified language from the Language field of the analytical context
+- **Explicit Language**: Respond only in the language given in the Language field
 
 ### RESPONSE GUIDELINES ###
 - **Avoid Technical Terms**: Never mention SQL syntax, database concepts, or technical implementation details
@@ -62,15 +67,6 @@ sql_to_answer_user_prompt_template = """
 ### TASK ###
 Transform the SQL query results into a clear, actionable answer that directly addresses the user's question using natural language and business context.
 
-### ANALYTICAL CONTEXT ###
-User's Question: {{ query }}
-SQL Query: {{ sql }}
-Query Results: 
-- Columns: {{ sql_data.columns }}
-- Data: {{ sql_data.data }}
-Language: {{ language }}
-Current Time: {{ current_time }}
-
 ### RESPONSE GUIDELINES ###
 - **Direct Answer**: Start with a clear, direct answer to the user's question
 - **Data Insights**: Highlight key findings, trends, and important numbers
@@ -86,12 +82,36 @@ Current Time: {{ current_time }}
 - Use headers (##) for major sections
 - Avoid technical jargon and SQL terminology
 
+### ANALYTICAL CONTEXT ###
+User's Question: {{ query }}
+SQL Query: {{ sql }}
+Query Results (CSV, header row first):
+{{ sql_data }}
+Language: {{ language }}
+Current Time: {{ current_time }}
+
 Custom Instruction: {{ custom_instruction }}
 
 Please think step by step and provide a comprehensive answer.
 """
 
 
+def _sql_data_as_csv(sql_data: dict) -> str:
+    # Jinja would print the Python repr of the rows, with brackets, quotes and
+    # spaces around every value; CSV carries the same table in far fewer tokens
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(
+        column.get("name", "") if isinstance(column, dict) else column
+        for column in sql_data.get("columns", [])
+    )
+    writer.writerows(
+        row.values() if isinstance(row, dict) else row
+        for row in sql_data.get("data", [])
+    )
+    return buffer.getvalue()
+
+
 ## Start of Pipeline
 @observe(capture_input=False)
 def prompt(
@@ -106,7 +126,7 @@ def prompt(
     _prompt = prompt_builder.run(
         query=query,
         sql=sql,
-        sql_data=sql_data,
+        sql_data=_sql_data_as_csv(sql_data),
         language=language,
         current_time=current_time,
         custom_instruction=custom_instruction,
@@ -133,11 +153,9 @@ class SQLAnswer(EnhancedBasicPipeline):
         llm_provider: LLMProvider,
         **kwargs,
     ):
-        self._user_queues = {}
+        self._user_queues = StreamingQueues()
         self._components = {
-            "prompt_builder": PromptBuilder(
-                template=sql_to_answer_user_prompt_template
-            ),
+            "prompt_builder": get_prompt_builder(sql_to_answer_user_prompt_template),
             "generator": llm_provider.get_generator(
                 system_prompt=sql_to_answer_system_prompt,
                 streaming_callback=self._streaming_callback,
@@ -150,39 +168,15 @@ class SQLAnswer(EnhancedBasicPipeline):
         )
 
     def _streaming_callback(self, chunk, query_id):
-        if query_id not in self._user_queues:
-            self._user_queues[
-                query_id
-            ] = asyncio.Queue()  # Create a new queue for the user if it doesn't exist
+        queue = self._user_queues.get(query_id)
         # Put the chunk content into the user's queue
-        asyncio.create_task(self._user_queues[query_id].put(chunk.content))
+        queue.put_nowait(chunk.content)
         if chunk.meta.get("finish_reason"):
-            asyncio.create_task(self._user_queues[query_id].put("<DONE>"))
+            queue.put_nowait("<DONE>")
 
     async def get_streaming_results(self, query_id):
-        async def _get_streaming_results(query_id):
-            return await self._user_queues[query_id].get()
-
-        if query_id not in self._user_queues:
-            self._user_queues[
-                query_id
-            ] = asyncio.Queue()  # Ensure the user's queue exists
-        while True:
-            try:
-                # Wait for an item from the user's queue
-                self._streaming_results = await asyncio.wait_for(
-                    _get_streaming_results(query_id), timeout=120
-                )
-                if (
-                    self._streaming_results == "<DONE>"
-                ):  # Check for end-of-stream signal
-                    del self._user_queues[query_id]
-                    break
-                if self._streaming_results:  # Check if there are results to yield
-                    yield self._streaming_results
-                    self._streaming_results = ""  # Clear after yielding
-            except TimeoutError:
-                break
+        async for chunk in self._user_queues.consume(query_id):
+            yield chunk
 
     @observe(name="SQL Answer Generation")
     async def _execute(
@@ -1,7 +1,9 @@
+import asyncio
 import logging
 import sys
 from typing import Any, Dict, List
 
+from cachetools import TTLCache
 from hamilton import base
 from hamilton.async_driver import AsyncDriver
 from haystack import Document
@@ -11,7 +13,11 @@ from langfuse.decorators import observe
 from src.core.engine import Engine
 from src.core.pipeline import EnhancedBasicPipeline
 from src.core.provider import DocumentStoreProvider, LLMProvider
-from src.pipelines.common import clean_up_new_lines, retrieve_metadata
+from src.pipelines.common import (
+    clean_up_new_lines,
+    get_prompt_builder,
+    retrieve_metadata,
+)
 from src.pipelines.generation.utils.sql import (
     SQL_GENERATION_MODEL_KWARGS,
     TEXT_TO_SQL_RULES,
@@ -74,25 +80,6 @@ sql_correction_user_prompt_template = """
 ### TASK ###
 Analyze the provided SQL query and error message to generate a corrected, valid SQL query that maintains the original query's intent and data retrieval logic.
 
-### CONTEXT INFORMATION ###
-{% if documents %}
-### DATABASE SCHEMA ###
-{% for document in documents %}
-    {{ document }}
-{% endfor %}
-{% endif %}
-
-{% if instructions %}
-### USER INSTRUCTIONS ###
-{% for instruction in instructions %}
-{{ loop.index }}. {{ instruction }}
-{% endfor %}
-{% endif %}
-
-### SQL CORRECTION CONTEXT ###
-SQL: {{ invalid_generation_result.sql }}
-Error Message: {{ invalid_generation_result.error }}
-
 ### CORRECTION GUIDELINES ###
 - **Error Analysis**: Carefully analyze the error message to understand the specific syntax issue
 - **Query Structure**: Examine the overall query structure for logical flow and completeness
@@ -115,6 +102,25 @@ Error Message: {{ invalid_generation_result.error }}
 - **Readability**: Ensure the corrected query is clear and maintainable
 - **Standards Compliance**: Follow ANSI SQL standards and best practices
 
+### CONTEXT INFORMATION ###
+{% if documents %}
+### DATABASE SCHEMA ###
+{% for document in documents %}
+    {{ document }}
+{% endfor %}
+{% endif %}
+
+{% if instructions %}
+### USER INSTRUCTIONS ###
+{% for instruction in instructions %}
+{{ loop.index }}. {{ instruction }}
+{% endfor %}
+{% endif %}
+
+### SQL CORRECTION CONTEXT ###
+SQL: {{ invalid_generation_result.sql }}
+Error Message: {{ invalid_generation_result.error }}
+
 Let's think step by step and provide the corrected SQL query.
 """
 
@@ -174,11 +180,15 @@ class SQLCorrection(EnhancedBasicPipeline):
         llm_provider: LLMProvider,
         document_store_provider: DocumentStoreProvider,
         engine: Engine,
+        metadata_ttl: int = 60,
         **kwargs,
     ):
         self._retriever = document_store_provider.get_retriever(
             document_store_provider.get_store("project_meta")
         )
+        # a project's data source only changes when it is redeployed, so dry-plan
+        # corrections reuse its metadata briefly instead of querying the store each time
+        self._metadata_cache = TTLCache(maxsize=1024, ttl=metadata_ttl)
 
         self._components = {
             "generator": llm_provider.get_generator(
@@ -186,9 +196,7 @@ class SQLCorrection(EnhancedBasicPipeline):
                 generation_kwargs=SQL_GENERATION_MODEL_KWARGS,
             ),
             "generator_name": llm_provider.get_model(),
-            "prompt_builder": PromptBuilder(
-                template=sql_correction_user_prompt_template
-            ),
+            "prompt_builder": get_prompt_builder(sql_correction_user_prompt_template),
             "post_processor": SQLGenPostProcessor(engine=engine),
         }
 
@@ -196,6 +204,15 @@ class SQLCorrection(EnhancedBasicPipeline):
             AsyncDriver({}, sys.modules[__name__], result_builder=base.DictResult())
         )
 
+    async def _project_metadata(self, project_id: str) -> dict[str, Any]:
+        if (metadata := self._metadata_cache.get(project_id)) is None:
+            metadata = await retrieve_metadata(project_id, self._retriever)
+            # a project without its project_meta document yet is looked up again
+            # instead of being treated as a local file until the entry expires
+            if metadata:
+                self._metadata_cache[project_id] = metadata
+        return metadata
+
     @observe(name="SQL Correction")
     async def _execute(
         self,
@@ -210,7 +227,7 @@ class SQLCorrection(EnhancedBasicPipeline):
         logger.info("SQLCorrection pipeline is running...")
 
         if use_dry_plan:
-            metadata = await retrieve_metadata(project_id or "", self._retriever)
+            metadata = await self._project_metadata(project_id or "")
         else:
             metadata = {}
 
@@ -249,5 +266,38 @@ class SQLCorrection(EnhancedBasicPipeline):
             allow_dry_plan_fallback=allow_dry_plan_fallback,
         )
 
-
-
+    async def run_many(
+        self,
+        contexts: List[Document],
+        invalid_generation_results: List[Dict[str, str]],
+        instructions: list[dict] | None = None,
+        sql_functions: list[SqlFunction] | None = None,
+        project_id: str | None = None,
+        use_dry_plan: bool = False,
+        allow_dry_plan_fallback: bool = True,
+        max_concurrency: int = 4,
+    ) -> list:
+        """
+        Corrects several invalid SQLs against the same contexts concurrently, at most
+        `max_concurrency` at a time. Results follow the order of
+        `invalid_generation_results`.
+        """
+        if use_dry_plan:
+            # fetched once up front, so the corrections share the cached metadata
+            await self._project_metadata(project_id or "")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _run(invalid_generation_result: Dict[str, str]):
+            async with semaphore:
+                return await self.run(
+                    contexts=contexts,
+                    invalid_generation_result=invalid_generation_result,
+                    instructions=instructions,
+                    sql_functions=sql_functions,
+                    project_id=project_id,
+                    use_dry_plan=use_dry_plan,
+                    allow_dry_plan_fallback=allow_dry_plan_fallback,
+                )
+
+        return await asyncio.gather(*map(_run, invalid_generation_results))
@@ -150,6 +150,7 @@ class UserGuideAssistance(EnhancedBasicPipeline):
         self._configs = {
             "analytics_docs": analytics_docs,
         }
+        self._base_inputs = {**self._components, **self._configs}
 
         super().__init__(
             AsyncDriver({}, sys.modules[__name__], result_builder=base.DictResult())
@@ -205,8 +206,7 @@ class UserGuideAssistance(EnhancedBasicPipeline):
                 "language": language,
                 "query_id": query_id or "",
                 "custom_instruction": custom_instruction or "",
-                **self._components,
-                **self._configs,
+                **self._base_inputs,
             },
         )
 
@@ -1,15 +1,47 @@
+import functools
+import hashlib
 import logging
-from typing import Any, Dict, Literal, Optional
+from typing import Any, Dict, Literal, NamedTuple, Optional
 
 import orjson
 import pandas as pd
+from cachetools import LRUCache
 from haystack import component
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
+from jsonschema import validators
+from jsonschema.exceptions import ValidationError, best_match
 from pydantic import BaseModel, ConfigDict, Field
 
+from src.utils import closed_json_schema
+
 logger = logging.getLogger("analytics-service")
 
+VEGA_LITE_SCHEMA_PATH = "src/pipelines/generation/utils/vega-lite-schema-v5.json"
+
+
+@functools.lru_cache(maxsize=1)
+def load_vega_lite_schema(path: str = VEGA_LITE_SCHEMA_PATH) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+# keyed by id(); each validator keeps its schema alive, so ids are never reused
+_VALIDATORS: Dict[int, Any] = {}
+
+
+def _validate_against(instance: dict, schema: Dict[str, Any]) -> None:
+    """
+    Same contract as `jsonschema.validate`, but the metaschema check and the
+    validator construction happen once per schema object instead of per call.
+    """
+    validator = _VALIDATORS.get(id(schema))
+    if validator is None:
+        cls = validators.validator_for(schema)
+        cls.check_schema(schema)
+        validator = _VALIDATORS[id(schema)] = cls(schema)
+
+    if (error := best_match(validator.iter_errors(instance))) is not None:
+        raise error
+
 
 def _validate_and_fix_schema(chart_schema: dict) -> dict:
     """
@@ -359,18 +391,61 @@ chart_generation_instructions = """
 """
 
 
-@component
+def _to_prompt_json(value: Any) -> str:
+    # compact, UTF-8 preserving JSON; numpy scalars from pandas are handled natively
+    return orjson.dumps(
+        value,
+        default=str,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    ).decode()
+
+
+class PreprocessedChartData(NamedTuple):
+    sample_data: list[dict]
+    sample_column_values: dict[str, Any]
+    # the same values serialized once for the prompt
+    sample_data_json: str
+    sample_column_values_json: str
+
+
 class ChartDataPreprocessor:
-    @component.output_types(
-        sample_data=list[dict],
-        sample_column_values=dict[str, Any],
-    )
+    """
+    Results are cached by a digest of the input, so a retried or regenerated chart
+    request for the same data reuses the same sample instead of re-sampling it.
+    The cached lists and dicts are shared, so callers must not mutate them.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self._cache = LRUCache(maxsize=maxsize)
+
     def run(
         self,
         data: Dict[str, Any],
         sample_data_count: int = 15,
         sample_column_size: int = 5,
-    ):
+    ) -> PreprocessedChartData:
+        try:
+            key = (
+                hashlib.blake2b(orjson.dumps(data), digest_size=16).digest(),
+                sample_data_count,
+                sample_column_size,
+            )
+        except TypeError:
+            # not JSON-serializable, e.g. Decimal values; just skip the cache
+            return self._preprocess(data, sample_data_count, sample_column_size)
+
+        if (result := self._cache.get(key)) is None:
+            result = self._cache[key] = self._preprocess(
+                data, sample_data_count, sample_column_size
+            )
+        return result
+
+    def _preprocess(
+        self,
+        data: Dict[str, Any],
+        sample_data_count: int,
+        sample_column_size: int,
+    ) -> PreprocessedChartData:
         columns = [
             column.get("name", "") if isinstance(column, dict) else column
             for column in data.get("columns", [])
@@ -387,10 +462,12 @@ class ChartDataPreprocessor:
         else:
             sample_data = df.to_dict(orient="records")
 
-        return {
-            "sample_data": sample_data,
-            "sample_column_values": sample_column_values,
-        }
+        return PreprocessedChartData(
+            sample_data=sample_data,
+            sample_column_values=sample_column_values,
+            sample_data_json=_to_prompt_json(sample_data),
+            sample_column_values_json=_to_prompt_json(sample_column_values),
+        )
 
 
 @component
@@ -422,7 +499,7 @@ class ChartGenerationPostProcessor:
                 ] = "https://vega.github.io/schema/vega-lite/v5.json"
                 chart_schema["data"] = {"values": sample_data}
 
-                validate(chart_schema, schema=vega_schema)
+                _validate_against(chart_schema, vega_schema)
 
                 if remove_data_from_chart_schema:
                     chart_schema["data"]["values"] = []
@@ -449,7 +526,7 @@ class ChartGenerationPostProcessor:
             try:
                 logger.info("Attempting to fix schema and re-validate...")
                 chart_schema = _validate_and_fix_schema(chart_schema)
-                validate(chart_schema, schema=vega_schema)
+                _validate_against(chart_schema, vega_schema)
 
                 if remove_data_from_chart_schema:
                     chart_schema["data"]["values"] = []
@@ -483,6 +560,11 @@ class ChartGenerationPostProcessor:
             }
 
 
+# a single instance of each helper is shared by all chart pipelines
+CHART_DATA_PREPROCESSOR = ChartDataPreprocessor()
+CHART_GENERATION_POST_PROCESSOR = ChartGenerationPostProcessor()
+
+
 class ChartSchema(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -651,3 +733,7 @@ class ChartGenerationResults(BaseModel):
         | StackedBarChartSchema
         | AreaChartSchema
     )
+
+
+# shared by the chart generation and chart adjustment response formats
+CHART_GENERATION_JSON_SCHEMA = closed_json_schema(ChartGenerationResults)
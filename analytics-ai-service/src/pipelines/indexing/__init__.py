@@ -1,5 +1,4 @@
 import asyncio
-import json
 import logging
 import re
 from typing import Any, Dict, List, Optional
@@ -59,7 +58,7 @@ class MDLValidator:
         try:
             mdl_json = orjson.loads(mdl)
             logger.info(f"MDL JSON: {mdl_json}")
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON: {e}")
         if "models" not in mdl_json:
             mdl_json["models"] = []
@@ -4,6 +4,7 @@ import sys
 import uuid
 from typing import Any, Dict, List, Optional
 
+import orjson
 from hamilton import base
 from hamilton.async_driver import AsyncDriver
 from hamilton.function_modifiers import extract_fields
@@ -144,7 +145,7 @@ class DDLChunker:
                 "comment": comment,
                 "name": table_name,
             }
-            return {"name": table_name, "payload": str(payload)}
+            return {"name": table_name, "payload": orjson.dumps(payload).decode()}
 
         def _column_command(column: Dict[str, Any], model: Dict[str, Any]) -> dict:
             if column.get("relationship"):
@@ -213,12 +214,12 @@ class DDLChunker:
             return [
                 {
                     "name": model["name"],
-                    "payload": str(
+                    "payload": orjson.dumps(
                         {
                             "type": "TABLE_COLUMNS",
                             "columns": filtered[i : i + column_batch_size],
                         }
-                    ),
+                    ).decode(),
                 }
                 for i in range(0, len(filtered), column_batch_size)
             ]
@@ -245,7 +246,8 @@ class DDLChunker:
             }
 
         return [
-            {"name": view["name"], "payload": str(_payload(view))} for view in views
+            {"name": view["name"], "payload": orjson.dumps(_payload(view)).decode()}
+            for view in views
         ]
 
     def _convert_metrics(self, metrics: List[Dict[str, Any]]) -> List[Dict[str, str]]:
@@ -286,7 +288,7 @@ class DDLChunker:
             }
 
         return [
-            {"name": metric["name"], "payload": str(_payload(metric))}
+            {"name": metric["name"], "payload": orjson.dumps(_payload(metric)).decode()}
             for metric in metrics
         ]
 
@@ -359,6 +361,7 @@ class DBSchema(EnhancedBasicPipeline):
         self._configs = {
             "column_batch_size": column_batch_size,
         }
+        self._base_inputs = {**self._components, **self._configs}
         self._final = "write"
 
         helper.load_helpers()
@@ -378,8 +381,7 @@ class DBSchema(EnhancedBasicPipeline):
             inputs={
                 "mdl_str": mdl_str,
                 "project_id": project_id,
-                **self._components,
-                **self._configs,
+                **self._base_inputs,
             },
         )
 
@@ -153,6 +153,7 @@ class HistoricalQuestion(EnhancedBasicPipeline):
             ),
         }
         self._configs = {}
+        self._base_inputs = {**self._components, **self._configs}
         self._final = "write"
 
         super().__init__(
@@ -171,8 +172,7 @@ class HistoricalQuestion(EnhancedBasicPipeline):
             inputs={
                 "mdl_str": mdl_str,
                 "project_id": project_id,
-                **self._components,
-                **self._configs,
+                **self._base_inputs,
             },
         )
 
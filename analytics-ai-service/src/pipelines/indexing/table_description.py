@@ -3,6 +3,7 @@ import sys
 import uuid
 from typing import Any, Dict, List, Optional
 
+import orjson
 from hamilton import base
 from hamilton.async_driver import AsyncDriver
 from hamilton.function_modifiers import extract_fields
@@ -34,7 +35,7 @@ class TableDescriptionChunker:
                     "name": chunk["name"],
                     **_additional_meta(),
                 },
-                "content": str(chunk),
+                "content": orjson.dumps(chunk).decode(),
             }
             for chunk in self._get_table_descriptions(mdl)
         ]
@@ -137,6 +138,7 @@ class TableDescription(EnhancedBasicPipeline):
             ),
         }
         self._configs = {}
+        self._base_inputs = {**self._components, **self._configs}
         self._final = "write"
 
         super().__init__(
@@ -155,8 +157,7 @@ class TableDescription(EnhancedBasicPipeline):
             inputs={
                 "mdl_str": mdl_str,
                 "project_id": project_id,
-                **self._components,
-                **self._configs,
+                **self._base_inputs,
             },
         )
 
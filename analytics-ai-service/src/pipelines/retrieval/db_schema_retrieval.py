@@ -1,6 +1,6 @@
-import ast
 import logging
 import sys
+from operator import attrgetter
 from typing import Any, Optional
 
 import orjson
@@ -15,9 +15,12 @@ from pydantic import BaseModel
 from src.core.pipeline import EnhancedBasicPipeline
 from src.core.provider import DocumentStoreProvider, EmbedderProvider, LLMProvider
 from src.pipelines.common import (
+    build_cached_table_ddl,
     build_table_ddl,
     clean_up_new_lines,
+    construct_table_schemas,
     get_engine_supported_data_type,
+    parse_document_content,
 )
 from src.utils import add_additional_properties_false, trace_cost
 from src.web.v1.services.ask import AskHistory
@@ -125,11 +128,7 @@ def _build_view_ddl(content: dict) -> str:
 async def embedding(query: str, embedder: Any, histories: list[AskHistory]) -> dict:
     if query:
         if histories:
-            previous_query_summaries = [history.question for history in histories]
-        else:
-            previous_query_summaries = []
-
-        query = "\n".join(previous_query_summaries) + "\n" + query
+            query = "\n".join(map(attrgetter("question"), histories)) + "\n" + query
 
         return await embedder.run(query)
     else:
@@ -175,20 +174,15 @@ async def dbschema_retrieval(
     tables = table_retrieval.get("documents", [])
     table_names = []
     for table in tables:
-        content = ast.literal_eval(table.content)
+        content = parse_document_content(table.content)
         table_names.append(content["name"])
 
-    table_name_conditions = [
-        {"field": "name", "operator": "==", "value": table_name}
-        for table_name in table_names
-    ]
-
-    if table_name_conditions:
+    if table_names:
         filters = {
             "operator": "AND",
             "conditions": [
                 {"field": "type", "operator": "==", "value": "TABLE_SCHEMA"},
-                {"operator": "OR", "conditions": table_name_conditions},
+                {"field": "name", "operator": "in", "value": table_names},
             ],
         }
 
@@ -205,30 +199,7 @@ async def dbschema_retrieval(
 
 @observe()
 def construct_db_schemas(dbschema_retrieval: list[Document]) -> list[dict]:
-    db_schemas = {}
-    for document in dbschema_retrieval:
-        content = ast.literal_eval(document.content)
-        if content["type"] == "TABLE":
-            if document.meta["name"] not in db_schemas:
-                db_schemas[document.meta["name"]] = content
-            else:
-                db_schemas[document.meta["name"]] = {
-                    **content,
-                    "columns": db_schemas[document.meta["name"]].get("columns", []),
-                }
-        elif content["type"] == "TABLE_COLUMNS":
-            if document.meta["name"] not in db_schemas:
-                db_schemas[document.meta["name"]] = {"columns": content["columns"]}
-            else:
-                if "columns" not in db_schemas[document.meta["name"]]:
-                    db_schemas[document.meta["name"]]["columns"] = content["columns"]
-                else:
-                    db_schemas[document.meta["name"]]["columns"] += content["columns"]
-
-    # remove incomplete schemas
-    db_schemas = {k: v for k, v in db_schemas.items() if "type" in v and "columns" in v}
-
-    return list(db_schemas.values())
+    return construct_table_schemas(dbschema_retrieval)
 
 
 @observe(capture_input=False)
@@ -246,7 +217,9 @@ def check_using_db_schemas_without_pruning(
 
     for table_schema in construct_db_schemas:
         if table_schema["type"] == "TABLE":
-            ddl, _has_calculated_field, _has_json_field = build_table_ddl(table_schema)
+            ddl, _has_calculated_field, _has_json_field = build_cached_table_ddl(
+                table_schema
+            )
             retrieval_results.append(
                 {
                     "table_name": table_schema["name"],
@@ -259,7 +232,7 @@ def check_using_db_schemas_without_pruning(
                 has_json_field = True
 
     for document in dbschema_retrieval:
-        content = ast.literal_eval(document.content)
+        content = parse_document_content(document.content)
 
         if content["type"] == "METRIC":
             retrieval_results.append(
@@ -309,15 +282,12 @@ def prompt(
 ) -> dict:
     if not check_using_db_schemas_without_pruning["db_schemas"]:
         db_schemas = [
-            build_table_ddl(construct_db_schema)[0]
+            build_cached_table_ddl(construct_db_schema)[0]
             for construct_db_schema in construct_db_schemas
         ]
 
-        previous_query_summaries = (
-            [history.question for history in histories] if histories else []
-        )
-
-        query = "\n".join(previous_query_summaries) + "\n" + query
+        if histories:
+            query = "\n".join(map(attrgetter("question"), histories)) + "\n" + query
 
         _prompt = prompt_builder.run(question=query, db_schemas=db_schemas)
         return {"prompt": clean_up_new_lines(_prompt.get("prompt"))}
@@ -385,7 +355,7 @@ def construct_retrieval_results(
 
         for document in dbschema_retrieval:
             if document.meta["name"] in columns_and_tables_needed:
-                content = ast.literal_eval(document.content)
+                content = parse_document_content(document.content)
 
                 if content["type"] == "METRIC":
                     retrieval_results.append(
@@ -490,6 +460,7 @@ class DbSchemaRetrieval(EnhancedBasicPipeline):
             "encoding": _encoding,
             "context_window_size": llm_provider.get_context_window_size(),
         }
+        self._base_inputs = {**self._components, **self._configs}
 
         super().__init__(
             AsyncDriver({}, sys.modules[__name__], result_builder=base.DictResult())
@@ -512,8 +483,7 @@ class DbSchemaRetrieval(EnhancedBasicPipeline):
                 "project_id": project_id or "",
                 "histories": histories or [],
                 "enable_column_pruning": enable_column_pruning,
-                **self._components,
-                **self._configs,
+                **self._base_inputs,
             },
         )
 
@@ -142,6 +142,7 @@ class HistoricalQuestionRetrieval(EnhancedBasicPipeline):
         self._configs = {
             "historical_question_retrieval_similarity_threshold": historical_question_retrieval_similarity_threshold,
         }
+        self._base_inputs = {**self._components, **self._configs}
 
         super().__init__(
             AsyncDriver({}, sys.modules[__name__], result_builder=base.DictResult())
@@ -155,8 +156,7 @@ class HistoricalQuestionRetrieval(EnhancedBasicPipeline):
             inputs={
                 "query": query,
                 "project_id": project_id or "",
-                **self._components,
-                **self._configs,
+                **self._base_inputs,
             },
         )
 
@@ -206,6 +206,7 @@ class Instructions(EnhancedBasicPipeline):
             "similarity_threshold": similarity_threshold,
             "top_k": top_k,
         }
+        self._base_inputs = {**self._components, **self._configs}
 
         super().__init__(
             AsyncDriver({}, sys.modules[__name__], result_builder=base.DictResult())
@@ -222,8 +223,7 @@ class Instructions(EnhancedBasicPipeline):
                 "query": query,
                 "project_id": project_id or "",
                 "scope": scope,
-                **self._components,
-                **self._configs,
+                **self._base_inputs,
             },
         )
 
@@ -137,6 +137,7 @@ class SqlPairsRetrieval(EnhancedBasicPipeline):
             "sql_pairs_similarity_threshold": sql_pairs_similarity_threshold,
             "sql_pairs_retrieval_max_size": sql_pairs_retrieval_max_size,
         }
+        self._base_inputs = {**self._components, **self._configs}
 
         super().__init__(
             AsyncDriver({}, sys.modules[__name__], result_builder=base.DictResult())
@@ -150,8 +151,7 @@ class SqlPairsRetrieval(EnhancedBasicPipeline):
             inputs={
                 "query": query,
                 "project_id": project_id or "",
-                **self._components,
-                **self._configs,
+                **self._base_inputs,
             },
         )
 
@@ -5,6 +5,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import backoff
 import openai
+from cachetools import LRUCache
 from haystack import Document, component
 from litellm import aembedding
 
@@ -38,16 +39,18 @@ class AsyncTextEmbedder:
         api_key: Optional[str] = None,
         api_base_url: Optional[str] = None,
         timeout: Optional[float] = None,
+        cache: Optional[LRUCache] = None,
         **kwargs,
     ):
         self._api_key = api_key
         self._model = model
         self._api_base_url = api_base_url
         self._timeout = timeout
+        # embeddings of recent texts, shared by every text embedder of the provider
+        self._cache = cache
         self._kwargs = kwargs
 
     @component.output_types(embedding=List[float], meta=Dict[str, Any])
-    @backoff.on_exception(backoff.expo, openai.APIError, max_time=60.0, max_tries=3)
     async def run(self, text: str):
         if not isinstance(text, str):
             raise TypeError(
@@ -59,6 +62,19 @@ class AsyncTextEmbedder:
         # replace newlines, which can negatively affect performance.
         text_to_embed = text.replace("\n", " ")
 
+        if self._cache is None:
+            return await self._embed(text_to_embed)
+
+        if (embedding := self._cache.get(text_to_embed)) is not None:
+            # nothing was sent to the model, so there is no usage to report
+            return {"embedding": embedding, "meta": {"model": self._model, "usage": {}}}
+
+        result = await self._embed(text_to_embed)
+        self._cache[text_to_embed] = result["embedding"]
+        return result
+
+    @backoff.on_exception(backoff.expo, openai.APIError, max_time=60.0, max_tries=3)
+    async def _embed(self, text_to_embed: str) -> Dict[str, Any]:
         response = await aembedding(
             model=self._model,
             input=[text_to_embed],
@@ -172,12 +188,19 @@ class LitellmEmbedderProvider(EmbedderProvider):
         ] = None,  # e.g. EMBEDDER_OPENAI_API_KEY, EMBEDDER_ANTHROPIC_API_KEY, etc.
         api_base: Optional[str] = None,
         timeout: float = 120.0,
+        text_embedding_cache_size: int = 256,
         **kwargs,
     ):
         self._api_key = os.getenv(api_key_name) if api_key_name else None
         self._api_base = remove_trailing_slash(api_base) if api_base else None
         self._embedding_model = model
         self._timeout = timeout
+        # 0 disables the cache; every query is sent to the model
+        self._text_embeddings = (
+            LRUCache(maxsize=text_embedding_cache_size)
+            if text_embedding_cache_size
+            else None
+        )
         if "provider" in kwargs:
             del kwargs["provider"]
         self._kwargs = kwargs
@@ -188,6 +211,7 @@ class LitellmEmbedderProvider(EmbedderProvider):
             api_base_url=self._api_base,
             model=self._embedding_model,
             timeout=self._timeout,
+            cache=self._text_embeddings,
             **self._kwargs,
         )
 
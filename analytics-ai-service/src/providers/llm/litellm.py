@@ -1,4 +1,6 @@
+import asyncio
 import os
+from contextlib import nullcontext
 from typing import Any, Callable, Dict, List, Optional
 
 import backoff
@@ -34,6 +36,8 @@ class LitellmLLMProvider(LLMProvider):
         context_window_size: int = 100000,
         fallback_model_list: Optional[List[Dict[str, Any]]] = None,
         fallback_testing: bool = False,
+        max_concurrency: Optional[int] = None,
+        cache_system_prompt: bool = False,
         **_,
     ):
         self._model = model
@@ -58,6 +62,13 @@ class LitellmLLMProvider(LLMProvider):
             fallbacks=fallbacks,
         )
         self._enable_fallback_testing = fallback_testing and self._has_fallbacks
+        # caps in-flight requests to this model; retries re-acquire a slot
+        self._concurrency_limit = (
+            asyncio.Semaphore(max_concurrency) if max_concurrency else nullcontext()
+        )
+        # system prompts are static per generator, so they can be marked for the
+        # provider's prompt cache (Anthropic, Bedrock, Vertex AI)
+        self._cache_system_prompt = cache_system_prompt
 
     def get_generator(
         self,
@@ -69,6 +80,20 @@ class LitellmLLMProvider(LLMProvider):
             **(generation_kwargs or {}),
             **(self._model_kwargs or {}),
         }
+        # the system prompt is fixed for the generator's lifetime, convert it once
+        openai_system_message = (
+            convert_message_to_openai_format(ChatMessage.from_system(system_prompt))
+            if system_prompt
+            else None
+        )
+        if openai_system_message and self._cache_system_prompt:
+            openai_system_message["content"] = [
+                {
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
 
         @backoff.on_exception(backoff.expo, openai.APIError, max_time=60.0, max_tries=3)
         async def _run(
@@ -79,20 +104,17 @@ class LitellmLLMProvider(LLMProvider):
             query_id: Optional[str] = None,
         ):
             message = ChatMessage.from_user(prompt, image_url)
-            if system_prompt:
-                messages = [ChatMessage.from_system(system_prompt)]
-                if history_messages:
-                    messages.extend(history_messages)
-                messages.append(message)
+            if history_messages:
+                messages = history_messages + [message]
             else:
-                if history_messages:
-                    messages = history_messages + [message]
-                else:
-                    messages = [message]
+                messages = [message]
 
             openai_formatted_messages = [
                 convert_message_to_openai_format(message) for message in messages
             ]
+            if openai_system_message:
+                # each request gets its own copy in case litellm rewrites messages
+                openai_formatted_messages.insert(0, dict(openai_system_message))
 
             generation_kwargs = {
                 **combined_generation_kwargs,
@@ -103,49 +125,52 @@ class LitellmLLMProvider(LLMProvider):
                 "allowed_openai_params", []
             ) + (["reasoning_effort"] if self._model.startswith("gpt-5") else [])
 
-            if self._has_fallbacks:
-                completion = await self._router.acompletion(
-                    model=self._model,
-                    messages=openai_formatted_messages,
-                    stream=streaming_callback is not None,
-                    allowed_openai_params=allowed_openai_params,
-                    mock_testing_fallbacks=self._enable_fallback_testing,
-                    **generation_kwargs,
-                )
-            else:
-                completion = await acompletion(
-                    model=self._model,
-                    api_key=self._api_key,
-                    api_base=self._api_base,
-                    api_version=self._api_version,
-                    timeout=self._timeout,
-                    messages=openai_formatted_messages,
-                    stream=streaming_callback is not None,
-                    allowed_openai_params=allowed_openai_params,
-                    **generation_kwargs,
-                )
-
-            completions: List[ChatMessage] = []
-            if streaming_callback is not None:
-                num_responses = generation_kwargs.pop("n", 1)
-                if num_responses > 1:
-                    raise ValueError(
-                        "Cannot stream multiple responses, please set n=1."
+            # held for the whole request, including consuming a streamed response
+            async with self._concurrency_limit:
+                if self._has_fallbacks:
+                    completion = await self._router.acompletion(
+                        model=self._model,
+                        messages=openai_formatted_messages,
+                        stream=streaming_callback is not None,
+                        allowed_openai_params=allowed_openai_params,
+                        mock_testing_fallbacks=self._enable_fallback_testing,
+                        **generation_kwargs,
+                    )
+                else:
+                    completion = await acompletion(
+                        model=self._model,
+                        api_key=self._api_key,
+                        api_base=self._api_base,
+                        api_version=self._api_version,
+                        timeout=self._timeout,
+                        messages=openai_formatted_messages,
+                        stream=streaming_callback is not None,
+                        allowed_openai_params=allowed_openai_params,
+                        **generation_kwargs,
                     )
-                chunks: List[StreamingChunk] = []
 
-                async for chunk in completion:
-                    if chunk.choices and streaming_callback:
-                        chunk_delta: StreamingChunk = build_chunk(chunk)
-                        chunks.append(chunk_delta)
-                        streaming_callback(
-                            chunk_delta, query_id
-                        )  # invoke callback with the chunk_delta
-                completions = [connect_chunks(chunk, chunks)]
-            else:
-                completions = [
-                    build_message(completion, choice) for choice in completion.choices
-                ]
+                completions: List[ChatMessage] = []
+                if streaming_callback is not None:
+                    num_responses = generation_kwargs.pop("n", 1)
+                    if num_responses > 1:
+                        raise ValueError(
+                            "Cannot stream multiple responses, please set n=1."
+                        )
+                    chunks: List[StreamingChunk] = []
+
+                    async for chunk in completion:
+                        if chunk.choices and streaming_callback:
+                            chunk_delta: StreamingChunk = build_chunk(chunk)
+                            chunks.append(chunk_delta)
+                            streaming_callback(
+                                chunk_delta, query_id
+                            )  # invoke callback with the chunk_delta
+                    completions = [connect_chunks(chunk, chunks)]
+                else:
+                    completions = [
+                        build_message(completion, choice)
+                        for choice in completion.choices
+                    ]
 
             # before returning, do post-processing of the completions
             for response in completions:
@@ -6,9 +6,9 @@ from pathlib import Path
 
 import requests
 from dotenv import load_dotenv
-from langfuse.decorators import langfuse_context
+from langfuse.decorators import langfuse_context, observe
 
-from src.config import Settings
+from src.config import Settings, settings
 
 logger = logging.getLogger("analytics-service")
 
@@ -76,6 +76,9 @@ def remove_trailing_slash(endpoint: str) -> str:
 
 
 def init_langfuse(settings: Settings):
+    # read by the Langfuse client when it is created on the first traced call;
+    # sampling is decided per trace, so sampled traces keep all their spans
+    os.environ["LANGFUSE_SAMPLE_RATE"] = str(settings.langfuse_sample_rate)
     langfuse_context.configure(
         enabled=settings.langfuse_enable,
         host=settings.langfuse_host,
@@ -85,6 +88,7 @@ def init_langfuse(settings: Settings):
 
     logger.info(f"LANGFUSE_ENABLE: {settings.langfuse_enable}")
     logger.info(f"LANGFUSE_HOST: {settings.langfuse_host}")
+    logger.info(f"LANGFUSE_SAMPLE_RATE: {settings.langfuse_sample_rate}")
 
 
 def trace_metadata(func):
@@ -182,19 +186,26 @@ def trace_cost(func):
     return wrapper
 
 
-def fetch_analytics_docs(doc_endpoint: str, is_oss: bool) -> list[dict]:
-    doc_endpoint = remove_trailing_slash(doc_endpoint)
+def observe_if_enabled(**kwargs):
+    """
+    Langfuse's `observe` when Langfuse is enabled, otherwise a decorator that
+    returns the function unchanged, so untraced deployments skip the span
+    bookkeeping on every call. It is resolved when the module is imported.
+    """
+    if settings.langfuse_enable:
+        return observe(**kwargs)
+    return lambda func: func
+
+
+@functools.lru_cache(maxsize=4)
+def _fetch_analytics_docs(doc_endpoint: str, is_oss: bool) -> tuple[dict, ...]:
     api_endpoint = (
         f"{doc_endpoint}/oss/llms.md" if is_oss else f"{doc_endpoint}/cloud/llms.md"
     )
 
-    try:
-        response = requests.get(api_endpoint, timeout=10)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        docs = response.text.split("\n---\n")
-    except requests.RequestException as e:
-        logger.error(f"Failed to fetch Analytics docs: {str(e)}")
-        return []  # Return empty list on error
+    response = requests.get(api_endpoint, timeout=10)
+    response.raise_for_status()  # Raise exception for 4XX/5XX responses
+    docs = response.text.split("\n---\n")
 
     doc_endpoint_base = f"{doc_endpoint}/oss" if is_oss else f"{doc_endpoint}/cloud"
     results = []
@@ -208,7 +219,19 @@ def fetch_analytics_docs(doc_endpoint: str, is_oss: bool) -> list[dict]:
                 }
             )
 
-    return results
+    return tuple(results)
+
+
+def fetch_analytics_docs(doc_endpoint: str, is_oss: bool) -> list[dict]:
+    """
+    Docs are fetched once per (doc_endpoint, is_oss) and reused for the lifetime of
+    the process; failed fetches are not cached so they are retried on the next call.
+    """
+    try:
+        return list(_fetch_analytics_docs(remove_trailing_slash(doc_endpoint), is_oss))
+    except requests.RequestException as e:
+        logger.error(f"Failed to fetch Analytics docs: {str(e)}")
+        return []  # Return empty list on error
 
 
 def extract_braces_content(resp: str) -> str:
@@ -235,11 +258,22 @@ def add_additional_properties_false(schema: dict) -> dict:
         # Add additionalProperties: false to objects
         if schema.get("type") == "object" or "properties" in schema:
             schema["additionalProperties"] = False
-        # Recursively process all values
+        # Recursively process nested containers, scalars have nothing to close
         for value in schema.values():
-            add_additional_properties_false(value)
+            if isinstance(value, (dict, list)):
+                add_additional_properties_false(value)
     elif isinstance(schema, list):
         # Recursively process list items
         for item in schema:
-            add_additional_properties_false(item)
+            if isinstance(item, (dict, list)):
+                add_additional_properties_false(item)
     return schema
+
+
+@functools.cache
+def closed_json_schema(model: type) -> dict:
+    """
+    The JSON schema of a pydantic model with additionalProperties: false on every
+    object, built once per model class. The returned dict is shared, do not mutate it.
+    """
+    return add_additional_properties_false(model.model_json_schema())
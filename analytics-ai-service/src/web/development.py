@@ -54,7 +54,8 @@ async def get_pipelines() -> dict:
     pipeline_params = {}
 
     # Extract pipelines from all services
-    for _, service in service_container.__dict__.items():
+    for name in service_container.SERVICES:
+        service = getattr(service_container, name)
         if hasattr(service, "_pipelines"):
             for pipeline_name, pipeline_instance in service._pipelines.items():
                 pipeline_params[pipeline_name] = _extract_run_method_params(
@@ -71,7 +72,8 @@ async def run_pipeline(pipeline_name: str, request_body: Dict[str, Any]) -> dict
     service_container = app.state.service_container
     pipe_components = {}
 
-    for _, service in service_container.__dict__.items():
+    for name in service_container.SERVICES:
+        service = getattr(service_container, name)
         if hasattr(service, "_pipelines"):
             for _pipeline_name, pipeline_instance in service._pipelines.items():
                 pipe_components[_pipeline_name] = pipeline_instance
@@ -1,9 +1,9 @@
 import asyncio
-import json
 import logging
 from dataclasses import dataclass
 from typing import Dict, List, Literal, Optional, Tuple
 
+import orjson
 from cachetools import TTLCache
 from langfuse.decorators import observe
 from pydantic import AliasChoices, BaseModel, Field
@@ -209,8 +209,8 @@ class AskService:
 
         This method queries the historical question cache to see if an identical or
         very similar question has been asked before. If found, it returns the cached
-        SQL result directly. Otherwise, it retrieves SQL samples and instructions
-        for SQL generation.
+        SQL result directly. Otherwise, it returns the SQL samples and instructions
+        for SQL generation, which are retrieved concurrently with the lookup.
 
         Args:
             user_query: User's natural language question
@@ -223,6 +223,15 @@ class AskService:
             - sql_samples: List of example SQL queries (empty if cached)
             - instructions: List of retrieval instructions (empty if cached)
         """
+        # sql samples and instructions don't depend on the lookup, so they are
+        # retrieved while it runs and dropped on a cache hit
+        sql_samples_and_instructions = asyncio.create_task(
+            self._retrieve_sql_samples_and_instructions(
+                user_query=user_query,
+                project_id=project_id,
+            )
+        )
+
         try:
             historical_question = await self._pipelines["historical_question"].run(
                 query=user_query,
@@ -236,6 +245,7 @@ class AskService:
 
             if historical_question_result:
                 # Cache hit - return historical results
+                sql_samples_and_instructions.cancel()
                 api_results = [
                     AskResult(
                         sql=result.get("statement"),
@@ -246,18 +256,13 @@ class AskService:
                 ]
                 return api_results, "", [], []
 
-            # Cache miss - retrieve sql_samples and instructions in parallel
-            (
-                sql_samples,
-                instructions,
-            ) = await self._retrieve_sql_samples_and_instructions(
-                user_query=user_query,
-                project_id=project_id,
-            )
+            # Cache miss - use the sql_samples and instructions retrieved meanwhile
+            sql_samples, instructions = await sql_samples_and_instructions
 
             return None, None, sql_samples, instructions
 
         except Exception as e:
+            sql_samples_and_instructions.cancel()
             logger.error(f"Error checking historical question: {e}")
             return None, None, [], []
 
@@ -410,7 +415,7 @@ class AskService:
                 sql_generation_reasoning
                 if isinstance(sql_generation_reasoning, str)
                 else (
-                    json.dumps(sql_generation_reasoning, ensure_ascii=False)
+                    orjson.dumps(sql_generation_reasoning).decode()
                     if sql_generation_reasoning
                     else None
                 )
@@ -583,7 +588,7 @@ class AskService:
                     sql_generation_reasoning
                     if isinstance(sql_generation_reasoning, str)
                     else (
-                        json.dumps(sql_generation_reasoning, ensure_ascii=False)
+                        orjson.dumps(sql_generation_reasoning).decode()
                         if sql_generation_reasoning
                         else None
                     )
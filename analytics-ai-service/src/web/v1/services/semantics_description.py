@@ -51,8 +51,10 @@ class SemanticsDescription:
         pipelines: Dict[str, BasicPipeline],
         maxsize: int = 1_000_000,
         ttl: int = 120,
+        models_per_call: int = 1,
     ):
         self._pipelines = pipelines
+        self._models_per_call = models_per_call
         self._cache: Dict[str, self.Resource] = TTLCache(maxsize=maxsize, ttl=ttl)
 
     def _handle_exception(
@@ -111,15 +113,37 @@ class SemanticsDescription:
             return [
                 {
                     **template,
-                    "mdl": {"models": [chunk]},
-                    "selected_models": [chunk["name"]],
+                    "mdl": {"models": batch},
+                    "selected_models": [chunk["name"] for chunk in batch],
                 }
-                for chunk in chunks
+                for batch in self._batch(chunks, chunk_size)
             ]
         except Exception as e:
             logger.error(f"Error creating chunks: {e}")
             raise
 
+    def _batch(self, chunks: list[dict], chunk_size: int) -> list[list[dict]]:
+        """
+        Groups consecutive chunks into one LLM call each, up to `models_per_call`
+        chunks and `chunk_size` columns per call, so small models share the system
+        prompt and round trip. A full chunk always fills a call by itself, so the
+        parts of a split model never end up in the same call.
+        """
+        batches, batch, columns = [], [], 0
+        for chunk in chunks:
+            if batch and (
+                len(batch) == self._models_per_call
+                or columns + len(chunk["columns"]) > chunk_size
+            ):
+                batches.append(batch)
+                batch, columns = [], 0
+            batch.append(chunk)
+            columns += len(chunk["columns"])
+
+        if batch:
+            batches.append(batch)
+        return batches
+
     async def _process_chunk(
         self, context: SemanticsDescriptionContext, chunk: dict
     ) -> None:
@@ -177,10 +201,10 @@ class SemanticsDescription:
         return [
             {
                 **template,
-                "mdl": {"models": [chunk]},
-                "selected_models": [chunk["name"]],
+                "mdl": {"models": batch},
+                "selected_models": [chunk["name"] for chunk in batch],
             }
-            for chunk in chunks
+            for batch in self._batch(chunks, chunk_size)
         ]
 
     async def _generate_task(self, request_id: str, chunk: dict):
@@ -57,3 +57,86 @@ def test_builder_validate_missing_components_raises():
 
     with pytest.raises(KeyError):
         ServiceContainerBuilder(settings=object(), pipe_components={}).build()
+
+
+def test_builder_validate_reports_missing_components_sorted():
+    from src.core.builder import REQUIRED_PIPE_COMPONENTS, ServiceContainerBuilder
+
+    pipe_components = dict.fromkeys(REQUIRED_PIPE_COMPONENTS - {"sql_answer"})
+    pipe_components.pop("chart_generation")
+
+    with pytest.raises(KeyError, match="chart_generation, sql_answer"):
+        ServiceContainerBuilder(
+            settings=object(), pipe_components=pipe_components
+        ).build()
+
+
+def test_service_container_builds_services_lazily(monkeypatch):
+    from src import globals as globals_module
+
+    calls = []
+
+    class FakeService:
+        def __init__(self, pipelines, **kwargs):
+            calls.append(pipelines)
+
+    monkeypatch.setattr(globals_module.services, "SqlPairsService", FakeService)
+
+    settings = types.SimpleNamespace(query_cache_maxsize=1, query_cache_ttl=1)
+    container = globals_module.ServiceContainer(
+        settings=settings,
+        pipe_components={},
+        shared={"sql_pairs_indexing": "sql_pairs_pipe"},
+    )
+
+    # nothing is constructed until the service is accessed
+    assert calls == []
+    assert container.sql_pairs_service is container.sql_pairs_service
+    assert calls == [{"sql_pairs": "sql_pairs_pipe"}]
+
+
+def test_build_concurrently_keeps_factory_names():
+    from src.core.builder import build_concurrently
+
+    built = build_concurrently({"a": lambda: 1, "b": lambda: 2})
+
+    assert built == {"a": 1, "b": 2}
+
+
+def test_build_concurrently_propagates_errors():
+    from src.core.builder import build_concurrently
+
+    def broken():
+        raise RuntimeError("cannot build")
+
+    with pytest.raises(RuntimeError, match="cannot build"):
+        build_concurrently({"ok": lambda: 1, "broken": broken})
+
+
+def test_service_container_warmup_builds_only_named_services(monkeypatch):
+    from src import globals as globals_module
+
+    calls = []
+
+    class FakeService:
+        def __init__(self, pipelines, **kwargs):
+            calls.append(pipelines)
+
+    monkeypatch.setattr(globals_module.services, "SqlPairsService", FakeService)
+    monkeypatch.setattr(
+        globals_module,
+        "fetch_analytics_docs",
+        lambda *_: pytest.fail("docs are only needed by the ask service"),
+    )
+
+    settings = types.SimpleNamespace(query_cache_maxsize=1, query_cache_ttl=1)
+    container = globals_module.ServiceContainer(
+        settings=settings,
+        pipe_components={},
+        shared={"sql_pairs_indexing": "sql_pairs_pipe"},
+    )
+
+    assert container.warmup(["sql_pairs_service"]) is container
+    assert calls == [{"sql_pairs": "sql_pairs_pipe"}]
+    assert "sql_pairs_service" in vars(container)
+    assert "sql_correction_service" not in vars(container)
@@ -0,0 +1,48 @@
+import asyncio
+
+
+def test_pipeline_result_class_is_resolved_per_subclass():
+    from pydantic import BaseModel
+
+    from src.core.pipeline import EnhancedBasicPipeline, PipelineResult
+
+    class Output(BaseModel):
+        value: int
+
+    class Typed(EnhancedBasicPipeline):
+        output_model = Output
+
+        async def _execute(self):
+            return {"value": 1}
+
+    class Untyped(EnhancedBasicPipeline):
+        async def _execute(self):
+            return {"value": 1}
+
+    assert Typed._result_cls is PipelineResult[Output]
+    assert Untyped._result_cls is None
+
+    typed = asyncio.run(Typed(pipe=None).run())
+    untyped = asyncio.run(Untyped(pipe=None).run())
+
+    assert typed.data == Output(value=1)
+    assert untyped.data == {"value": 1}
+    assert isinstance(untyped, PipelineResult)
+
+
+def test_async_driver_is_shared_per_module():
+    from unittest.mock import MagicMock
+
+    from src.core.pipeline import get_async_driver
+    from src.pipelines.generation import chart_adjustment, chart_generation
+    from src.pipelines.generation.chart_adjustment import ChartAdjustment
+
+    first = ChartAdjustment(llm_provider=MagicMock())
+    second = ChartAdjustment(llm_provider=MagicMock())
+
+    assert first._pipe is second._pipe
+    assert get_async_driver(chart_adjustment.__name__) is first._pipe
+    assert get_async_driver(chart_generation.__name__) is get_async_driver(
+        chart_generation.__name__
+    )
+    assert get_async_driver(chart_generation.__name__) is not first._pipe
@@ -0,0 +1,60 @@
+import asyncio
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+
+from src import utils
+from src.pipelines.generation.chart_generation import generate_chart
+from src.pipelines.generation.utils.chart import ChartDataPreprocessor
+
+
+@pytest.mark.asyncio
+async def test_coalesced_generations_trace_usage_once(monkeypatch):
+    langfuse_context = MagicMock()
+    monkeypatch.setattr(utils, "langfuse_context", langfuse_context)
+
+    async def generator(prompt):
+        await asyncio.sleep(0.01)
+        return {
+            "replies": ["{}"],
+            "meta": [{"model": "gpt-4o-mini", "usage": {"total_tokens": 10}}],
+        }
+
+    # skip the Langfuse span and call the trace_cost wrapper directly
+    first, second = await asyncio.gather(
+        generate_chart.__wrapped__({"prompt": "chart"}, generator, "gpt-4o-mini"),
+        generate_chart.__wrapped__({"prompt": "chart"}, generator, "gpt-4o-mini"),
+    )
+
+    assert first["replies"] == second["replies"] == ["{}"]
+    assert "meta" in first
+    assert "meta" not in second
+    langfuse_context.update_current_observation.assert_called_once_with(
+        model="gpt-4o-mini", usage_details={"total_tokens": 10}
+    )
+
+
+def test_preprocessor_reuses_result_for_identical_data():
+    preprocessor = ChartDataPreprocessor()
+    data = {"columns": ["region", "sales"], "data": [["east", 10], ["west", 20]]}
+
+    first = preprocessor.run(data)
+
+    assert preprocessor.run({**data}) is first
+    assert preprocessor.run(data, sample_data_count=1) is not first
+    assert first.sample_data == [
+        {"region": "east", "sales": 10},
+        {"region": "west", "sales": 20},
+    ]
+
+
+def test_preprocessor_skips_cache_for_unserializable_data():
+    preprocessor = ChartDataPreprocessor()
+    data = {"columns": ["region", "sales"], "data": [["east", Decimal("10.5")]]}
+
+    first = preprocessor.run(data)
+
+    assert preprocessor.run(data) is not first
+    assert first.sample_data == [{"region": "east", "sales": Decimal("10.5")}]
+    assert len(preprocessor._cache) == 0
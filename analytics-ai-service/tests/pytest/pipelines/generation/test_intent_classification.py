@@ -0,0 +1,73 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.pipelines.generation.intent_classification import (
+    SMALL_TALK_REGEX,
+    IntentClassification,
+)
+
+
+class FakePipe:
+    def __init__(self):
+        self.finals = []
+
+    async def execute(self, final_vars, inputs, overrides=None):
+        self.finals.append(final_vars)
+        if final_vars == ["construct_db_schemas"]:
+            return {"construct_db_schemas": ["CREATE TABLE sales (id INT)"]}
+        return {
+            "post_process": {
+                "rephrased_question": inputs["query"],
+                "intent": "TEXT_TO_SQL",
+                "reasoning": "classified by the model",
+                "db_schemas": [],
+            }
+        }
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = IntentClassification(
+        llm_provider=MagicMock(),
+        embedder_provider=MagicMock(),
+        document_store_provider=MagicMock(),
+        analytics_docs=[],
+    )
+    pipeline._pipe = FakePipe()
+    return pipeline
+
+
+@pytest.mark.parametrize("query", ["hi", "Hello!", "  thank you. ", "Good morning"])
+def test_small_talk_regex_matches_whole_greetings(query):
+    assert SMALL_TALK_REGEX.fullmatch(query)
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["hi, show me sales", "highest sales", "thanks, now by region", "hey there"],
+)
+def test_small_talk_regex_ignores_questions(query):
+    assert SMALL_TALK_REGEX.fullmatch(query) is None
+
+
+@pytest.mark.asyncio
+async def test_small_talk_skips_the_llm(pipeline):
+    result = await pipeline.run(query="Hello!", project_id="project")
+
+    assert pipeline._pipe.finals == [["construct_db_schemas"]]
+    assert result["post_process"] == {
+        "rephrased_question": "Hello!",
+        "intent": "MISLEADING_QUERY",
+        "reasoning": "",
+        "db_schemas": ["CREATE TABLE sales (id INT)"],
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query", ["hi, show me sales", "highest sales"])
+async def test_questions_are_classified_by_the_llm(pipeline, query):
+    result = await pipeline.run(query=query, project_id="project")
+
+    assert pipeline._pipe.finals == [["post_process"]]
+    assert result["post_process"]["intent"] == "TEXT_TO_SQL"
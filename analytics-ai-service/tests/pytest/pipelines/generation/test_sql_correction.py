@@ -0,0 +1,84 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.pipelines.generation import sql_correction
+from src.pipelines.generation.sql_correction import SQLCorrection
+
+
+@pytest.fixture
+def pipeline():
+    return SQLCorrection(
+        llm_provider=MagicMock(),
+        document_store_provider=MagicMock(),
+        engine=MagicMock(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_many_keeps_order_and_caps_concurrency(pipeline, monkeypatch):
+    running = peak = 0
+
+    async def run(invalid_generation_result, **kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        # later inputs finish first, so the order comes from gather, not timing
+        await asyncio.sleep(0.01 / invalid_generation_result["n"])
+        running -= 1
+        return invalid_generation_result["n"]
+
+    monkeypatch.setattr(pipeline, "run", run)
+
+    results = await pipeline.run_many(
+        contexts=[],
+        invalid_generation_results=[{"n": n} for n in range(1, 7)],
+        max_concurrency=2,
+    )
+
+    assert results == [1, 2, 3, 4, 5, 6]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_run_many_looks_up_metadata_once_for_dry_plan(pipeline, monkeypatch):
+    lookups = []
+
+    async def retrieve_metadata(project_id, retriever):
+        lookups.append(project_id)
+        return {"data_source": "postgres"}
+
+    monkeypatch.setattr(sql_correction, "retrieve_metadata", retrieve_metadata)
+
+    async def run(invalid_generation_result, project_id, use_dry_plan, **kwargs):
+        return await pipeline._project_metadata(project_id)
+
+    monkeypatch.setattr(pipeline, "run", run)
+
+    results = await pipeline.run_many(
+        contexts=[],
+        invalid_generation_results=[{"sql": "a"}, {"sql": "b"}, {"sql": "c"}],
+        project_id="project",
+        use_dry_plan=True,
+    )
+
+    assert results == [{"data_source": "postgres"}] * 3
+    assert lookups == ["project"]
+
+
+@pytest.mark.asyncio
+async def test_missing_project_metadata_is_not_cached(pipeline, monkeypatch):
+    stored = []
+
+    async def retrieve_metadata(project_id, retriever):
+        return stored[-1] if stored else {}
+
+    monkeypatch.setattr(sql_correction, "retrieve_metadata", retrieve_metadata)
+
+    assert await pipeline._project_metadata("project") == {}
+
+    # the project is deployed and its metadata indexed
+    stored.append({"data_source": "postgres"})
+
+    assert await pipeline._project_metadata("project") == {"data_source": "postgres"}
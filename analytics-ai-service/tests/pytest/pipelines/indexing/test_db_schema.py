@@ -40,13 +40,11 @@ async def test_single_model():
 
     document: Document = actual["documents"][0]
     assert document.meta == {"type": "TABLE_SCHEMA", "name": "user"}
-    assert document.content == str(
-        {
-            "type": "TABLE",
-            "comment": "\n/* {'alias': 'user', 'description': 'A table containing user information.'} */\n",
-            "name": "user",
-        }
-    )
+    assert orjson.loads(document.content) == {
+        "type": "TABLE",
+        "comment": "\n/* {'alias': 'user', 'description': 'A table containing user information.'} */\n",
+        "name": "user",
+    }
 
 
 @pytest.mark.asyncio
@@ -79,23 +77,19 @@ async def test_multiple_models():
 
     document_1: Document = actual["documents"][0]
     assert document_1.meta == {"type": "TABLE_SCHEMA", "name": "user"}
-    assert document_1.content == str(
-        {
-            "type": "TABLE",
-            "comment": "\n/* {'alias': 'user', 'description': 'A table containing user information.'} */\n",
-            "name": "user",
-        }
-    )
+    assert orjson.loads(document_1.content) == {
+        "type": "TABLE",
+        "comment": "\n/* {'alias': 'user', 'description': 'A table containing user information.'} */\n",
+        "name": "user",
+    }
 
     document_2: Document = actual["documents"][1]
     assert document_2.meta == {"type": "TABLE_SCHEMA", "name": "order"}
-    assert document_2.content == str(
-        {
-            "type": "TABLE",
-            "comment": "\n/* {'alias': 'order', 'description': 'A table containing order details.'} */\n",
-            "name": "order",
-        }
-    )
+    assert orjson.loads(document_2.content) == {
+        "type": "TABLE",
+        "comment": "\n/* {'alias': 'order', 'description': 'A table containing order details.'} */\n",
+        "name": "order",
+    }
 
 
 @pytest.mark.asyncio
@@ -124,20 +118,18 @@ async def test_column_is_primary_key():
 
     document_0: Document = actual["documents"][0]
     assert document_0.meta == {"type": "TABLE_SCHEMA", "name": "user"}
-    assert document_0.content == str(
-        {
-            "type": "TABLE_COLUMNS",
-            "columns": [
-                {
-                    "type": "COLUMN",
-                    "comment": "",
-                    "name": "id",
-                    "data_type": "INTEGER",
-                    "is_primary_key": True,
-                }
-            ],
-        }
-    )
+    assert orjson.loads(document_0.content) == {
+        "type": "TABLE_COLUMNS",
+        "columns": [
+            {
+                "type": "COLUMN",
+                "comment": "",
+                "name": "id",
+                "data_type": "INTEGER",
+                "is_primary_key": True,
+            }
+        ],
+    }
 
 
 @pytest.mark.asyncio
@@ -169,30 +161,26 @@ async def test_column_with_properties():
 
     document_0: Document = actual["documents"][0]
     assert document_0.meta == {"type": "TABLE_SCHEMA", "name": "user"}
-    assert document_0.content == str(
-        {
-            "type": "TABLE_COLUMNS",
-            "columns": [
-                {
-                    "type": "COLUMN",
-                    "comment": '-- {"alias":"iid","description":"The unique identifier for a user."}\n  ',
-                    "name": "id",
-                    "data_type": "INTEGER",
-                    "is_primary_key": False,
-                }
-            ],
-        }
-    )
+    assert orjson.loads(document_0.content) == {
+        "type": "TABLE_COLUMNS",
+        "columns": [
+            {
+                "type": "COLUMN",
+                "comment": '-- {"alias":"iid","description":"The unique identifier for a user."}\n  ',
+                "name": "id",
+                "data_type": "INTEGER",
+                "is_primary_key": False,
+            }
+        ],
+    }
 
     document_1: Document = actual["documents"][1]
     assert document_1.meta == {"type": "TABLE_SCHEMA", "name": "user"}
-    assert document_1.content == str(
-        {
-            "type": "TABLE",
-            "comment": "\n/* {'alias': '', 'description': ''} */\n",
-            "name": "user",
-        }
-    )
+    assert orjson.loads(document_1.content) == {
+        "type": "TABLE",
+        "comment": "\n/* {'alias': '', 'description': ''} */\n",
+        "name": "user",
+    }
 
 
 @pytest.mark.asyncio
@@ -226,20 +214,18 @@ async def test_column_with_nested_columns():
 
     document_0: Document = actual["documents"][0]
     assert document_0.meta == {"type": "TABLE_SCHEMA", "name": "user"}
-    assert document_0.content == str(
-        {
-            "type": "TABLE_COLUMNS",
-            "columns": [
-                {
-                    "type": "COLUMN",
-                    "comment": '-- {"alias":"iid","description":"The unique identifier for a user.","nested_columns":{"nested.address":{"name":"address","type":"VARCHAR"},"nested.orders":{"name":"orders","type":"ARRAY"}}}\n  ',
-                    "name": "id",
-                    "data_type": "INTEGER",
-                    "is_primary_key": False,
-                }
-            ],
-        }
-    )
+    assert orjson.loads(document_0.content) == {
+        "type": "TABLE_COLUMNS",
+        "columns": [
+            {
+                "type": "COLUMN",
+                "comment": '-- {"alias":"iid","description":"The unique identifier for a user.","nested_columns":{"nested.address":{"name":"address","type":"VARCHAR"},"nested.orders":{"name":"orders","type":"ARRAY"}}}\n  ',
+                "name": "id",
+                "data_type": "INTEGER",
+                "is_primary_key": False,
+            }
+        ],
+    }
 
 
 @pytest.mark.asyncio
@@ -269,20 +255,18 @@ async def test_column_with_calculated_property():
 
     document_0: Document = actual["documents"][0]
     assert document_0.meta == {"type": "TABLE_SCHEMA", "name": "user"}
-    assert document_0.content == str(
-        {
-            "type": "TABLE_COLUMNS",
-            "columns": [
-                {
-                    "type": "COLUMN",
-                    "comment": "-- This column is a Calculated Field\n  -- column expression: id + 1\n  ",
-                    "name": "id",
-                    "data_type": "INTEGER",
-                    "is_primary_key": False,
-                }
-            ],
-        }
-    )
+    assert orjson.loads(document_0.content) == {
+        "type": "TABLE_COLUMNS",
+        "columns": [
+            {
+                "type": "COLUMN",
+                "comment": "-- This column is a Calculated Field\n  -- column expression: id + 1\n  ",
+                "name": "id",
+                "data_type": "INTEGER",
+                "is_primary_key": False,
+            }
+        ],
+    }
 
 
 @pytest.mark.asyncio
@@ -333,52 +317,46 @@ async def test_column_with_relationship():
 
     document_0: Document = actual["documents"][0]
     assert document_0.meta == {"type": "TABLE_SCHEMA", "name": "user"}
-    assert document_0.content == str(
-        {
-            "type": "TABLE_COLUMNS",
-            "columns": [
-                {
-                    "type": "COLUMN",
-                    "comment": "",
-                    "name": "id",
-                    "data_type": "INTEGER",
-                    "is_primary_key": True,
-                }
-            ],
-        }
-    )
+    assert orjson.loads(document_0.content) == {
+        "type": "TABLE_COLUMNS",
+        "columns": [
+            {
+                "type": "COLUMN",
+                "comment": "",
+                "name": "id",
+                "data_type": "INTEGER",
+                "is_primary_key": True,
+            }
+        ],
+    }
 
     document_1: Document = actual["documents"][1]
     assert document_1.meta == {"type": "TABLE_SCHEMA", "name": "user"}
-    assert document_1.content == str(
-        {
-            "type": "TABLE_COLUMNS",
-            "columns": [
-                {
-                    "type": "FOREIGN_KEY",
-                    "comment": '-- {"condition": user.id = order.user_id, "joinType": ONE_TO_MANY}\n  ',
-                    "constraint": "FOREIGN KEY (id) REFERENCES order(user_id)",
-                    "tables": ["user", "order"],
-                }
-            ],
-        }
-    )
+    assert orjson.loads(document_1.content) == {
+        "type": "TABLE_COLUMNS",
+        "columns": [
+            {
+                "type": "FOREIGN_KEY",
+                "comment": '-- {"condition": user.id = order.user_id, "joinType": ONE_TO_MANY}\n  ',
+                "constraint": "FOREIGN KEY (id) REFERENCES order(user_id)",
+                "tables": ["user", "order"],
+            }
+        ],
+    }
 
     document_4: Document = actual["documents"][4]
     assert document_4.meta == {"type": "TABLE_SCHEMA", "name": "order"}
-    assert document_4.content == str(
-        {
-            "type": "TABLE_COLUMNS",
-            "columns": [
-                {
-                    "type": "FOREIGN_KEY",
-                    "comment": '-- {"condition": user.id = order.user_id, "joinType": ONE_TO_MANY}\n  ',
-                    "constraint": "FOREIGN KEY (user_id) REFERENCES user(id)",
-                    "tables": ["user", "order"],
-                }
-            ],
-        }
-    )
+    assert orjson.loads(document_4.content) == {
+        "type": "TABLE_COLUMNS",
+        "columns": [
+            {
+                "type": "FOREIGN_KEY",
+                "comment": '-- {"condition": user.id = order.user_id, "joinType": ONE_TO_MANY}\n  ',
+                "constraint": "FOREIGN KEY (user_id) REFERENCES user(id)",
+                "tables": ["user", "order"],
+            }
+        ],
+    }
 
 
 @pytest.mark.asyncio
@@ -404,44 +382,40 @@ async def test_column_batch_size():
 
     document_0: Document = actual["documents"][0]
     assert document_0.meta == {"type": "TABLE_SCHEMA", "name": "user"}
-    assert document_0.content == str(
-        {
-            "type": "TABLE_COLUMNS",
-            "columns": [
-                {
-                    "type": "COLUMN",
-                    "comment": "",
-                    "name": "id",
-                    "data_type": "INTEGER",
-                    "is_primary_key": False,
-                },
-                {
-                    "type": "COLUMN",
-                    "comment": "",
-                    "name": "name",
-                    "data_type": "VARCHAR",
-                    "is_primary_key": False,
-                },
-            ],
-        }
-    )
+    assert orjson.loads(document_0.content) == {
+        "type": "TABLE_COLUMNS",
+        "columns": [
+            {
+                "type": "COLUMN",
+                "comment": "",
+                "name": "id",
+                "data_type": "INTEGER",
+                "is_primary_key": False,
+            },
+            {
+                "type": "COLUMN",
+                "comment": "",
+                "name": "name",
+                "data_type": "VARCHAR",
+                "is_primary_key": False,
+            },
+        ],
+    }
 
     document_1: Document = actual["documents"][1]
     assert document_1.meta == {"type": "TABLE_SCHEMA", "name": "user"}
-    assert document_1.content == str(
-        {
-            "type": "TABLE_COLUMNS",
-            "columns": [
-                {
-                    "type": "COLUMN",
-                    "comment": "",
-                    "name": "age",
-                    "data_type": "INTEGER",
-                    "is_primary_key": False,
-                }
-            ],
-        }
-    )
+    assert orjson.loads(document_1.content) == {
+        "type": "TABLE_COLUMNS",
+        "columns": [
+            {
+                "type": "COLUMN",
+                "comment": "",
+                "name": "age",
+                "data_type": "INTEGER",
+                "is_primary_key": False,
+            }
+        ],
+    }
 
 
 @pytest.mark.asyncio
@@ -458,14 +432,12 @@ async def test_view():
 
     document_0: Document = actual["documents"][0]
     assert document_0.meta == {"type": "TABLE_SCHEMA", "name": "view_1"}
-    assert document_0.content == str(
-        {
-            "type": "VIEW",
-            "comment": "",
-            "name": "view_1",
-            "statement": "SELECT * FROM user",
-        }
-    )
+    assert orjson.loads(document_0.content) == {
+        "type": "VIEW",
+        "comment": "",
+        "name": "view_1",
+        "statement": "SELECT * FROM user",
+    }
 
 
 @pytest.mark.asyncio
@@ -488,14 +460,12 @@ async def test_view_with_properties():
 
     document_0: Document = actual["documents"][0]
     assert document_0.meta == {"type": "TABLE_SCHEMA", "name": "view_1"}
-    assert document_0.content == str(
-        {
-            "type": "VIEW",
-            "comment": "/* {'description': 'A view containing user information.'} */\n",
-            "name": "view_1",
-            "statement": "SELECT * FROM user",
-        }
-    )
+    assert orjson.loads(document_0.content) == {
+        "type": "VIEW",
+        "comment": "/* {'description': 'A view containing user information.'} */\n",
+        "name": "view_1",
+        "statement": "SELECT * FROM user",
+    }
 
 
 @pytest.mark.asyncio
@@ -523,27 +493,25 @@ async def test_metric():
 
     document_0: Document = actual["documents"][0]
     assert document_0.meta == {"type": "TABLE_SCHEMA", "name": "metric_1"}
-    assert document_0.content == str(
-        {
-            "type": "METRIC",
-            "comment": "\n/* This table is a metric */\n/* Metric Base Object: user */\n",
-            "name": "metric_1",
-            "columns": [
-                {
-                    "type": "COLUMN",
-                    "comment": "-- This column is a dimension\n  ",
-                    "name": "gender",
-                    "data_type": "VARCHAR",
-                },
-                {
-                    "type": "COLUMN",
-                    "comment": "-- This column is a measure\n  -- expression: SUM(age)\n  ",
-                    "name": "age",
-                    "data_type": "INTEGER",
-                },
-            ],
-        }
-    )
+    assert orjson.loads(document_0.content) == {
+        "type": "METRIC",
+        "comment": "\n/* This table is a metric */\n/* Metric Base Object: user */\n",
+        "name": "metric_1",
+        "columns": [
+            {
+                "type": "COLUMN",
+                "comment": "-- This column is a dimension\n  ",
+                "name": "gender",
+                "data_type": "VARCHAR",
+            },
+            {
+                "type": "COLUMN",
+                "comment": "-- This column is a measure\n  -- expression: SUM(age)\n  ",
+                "name": "age",
+                "data_type": "INTEGER",
+            },
+        ],
+    }
 
 
 @pytest.mark.asyncio
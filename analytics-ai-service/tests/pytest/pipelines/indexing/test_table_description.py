@@ -38,13 +38,11 @@ def test_single_table_description():
 
     document: Document = actual["documents"][0]
     assert document.meta == {"type": "TABLE_DESCRIPTION", "name": "user"}
-    assert document.content == str(
-        {
-            "name": "user",
-            "description": "A table containing user information.",
-            "columns": "",
-        }
-    )
+    assert orjson.loads(document.content) == {
+        "name": "user",
+        "description": "A table containing user information.",
+        "columns": "",
+    }
 
 
 def test_multiple_table_descriptions():
@@ -73,23 +71,19 @@ def test_multiple_table_descriptions():
         "type": "TABLE_DESCRIPTION",
         "name": "user",
     }
-    assert document_1.content == str(
-        {
-            "name": "user",
-            "description": "A table containing user information.",
-            "columns": "",
-        }
-    )
+    assert orjson.loads(document_1.content) == {
+        "name": "user",
+        "description": "A table containing user information.",
+        "columns": "",
+    }
 
     document_2: Document = actual["documents"][1]
     assert document_2.meta == {"type": "TABLE_DESCRIPTION", "name": "order"}
-    assert document_2.content == str(
-        {
-            "name": "order",
-            "description": "A table containing order details.",
-            "columns": "",
-        }
-    )
+    assert orjson.loads(document_2.content) == {
+        "name": "order",
+        "description": "A table containing order details.",
+        "columns": "",
+    }
 
 
 def test_table_description_missing_name():
@@ -123,7 +117,11 @@ def test_table_description_missing_description():
 
     document: Document = actual["documents"][0]
     assert document.meta == {"type": "TABLE_DESCRIPTION", "name": "user"}
-    assert document.content == str({"name": "user", "description": "", "columns": ""})
+    assert orjson.loads(document.content) == {
+        "name": "user",
+        "description": "",
+        "columns": "",
+    }
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,317 @@
+import asyncio
+
+import orjson
+import pytest
+from haystack import Document
+
+from src.pipelines.common import (
+    GenerationCache,
+    InflightCoalescer,
+    SemanticCache,
+    StreamingQueues,
+    build_cached_table_ddl,
+    build_table_ddl,
+    compact_prompt,
+    construct_table_schemas,
+    parse_document_content,
+    parse_json_reply,
+)
+
+
+def test_parse_document_content_accepts_json_and_legacy_repr():
+    payload = {"type": "TABLE", "name": "user", "comment": None, "pk": True}
+
+    assert (
+        parse_document_content(
+            '{"type": "TABLE", "name": "user", "comment": null, "pk": true}'
+        )
+        == payload
+    )
+    assert parse_document_content(str(payload)) == payload
+
+
+def test_parse_json_reply_tolerates_raw_newlines_in_strings():
+    assert parse_json_reply('\n  {"questions": []}\n') == {"questions": []}
+    assert parse_json_reply('{"question": "Top\nregions"}') == {
+        "question": "Top regions"
+    }
+
+
+def test_compact_prompt_keeps_template_lines():
+    template = "\n### TASK ###  \n{% if documents %}\n\n{{ documents }}\n{% endif %}\n"
+
+    assert compact_prompt(template) == (
+        "### TASK ###\n{% if documents %}\n\n{{ documents }}\n{% endif %}"
+    )
+
+
+def test_construct_table_schemas_merges_column_batches():
+    def document(name: str, content: dict) -> Document:
+        return Document(content=orjson.dumps(content).decode(), meta={"name": name})
+
+    schemas = construct_table_schemas(
+        [
+            document("orders", {"type": "TABLE_COLUMNS", "columns": [{"name": "id"}]}),
+            document("users", {"type": "TABLE", "comment": "", "name": "users"}),
+            document("orders", {"type": "TABLE", "comment": "", "name": "orders"}),
+            document(
+                "orders", {"type": "TABLE_COLUMNS", "columns": [{"name": "total"}]}
+            ),
+            document("items", {"type": "TABLE_COLUMNS", "columns": [{"name": "sku"}]}),
+            document("revenue", {"type": "METRIC", "name": "revenue", "columns": []}),
+        ]
+    )
+
+    assert schemas == [
+        {
+            "type": "TABLE",
+            "comment": "",
+            "name": "orders",
+            "columns": [{"name": "id"}, {"name": "total"}],
+        }
+    ]
+
+
+def test_build_cached_table_ddl_matches_build_table_ddl():
+    schema = {
+        "type": "TABLE",
+        "comment": "",
+        "name": "orders",
+        "columns": [
+            {
+                "type": "COLUMN",
+                "comment": "",
+                "name": "payload",
+                "data_type": "JSON",
+                "is_primary_key": False,
+            }
+        ],
+    }
+
+    first = build_cached_table_ddl(schema)
+
+    assert first == build_table_ddl(schema)
+    assert first[2] is True
+    assert build_cached_table_ddl(dict(schema)) is first
+
+
+def test_streaming_queues_reuse_queue_per_query_id():
+    queues = StreamingQueues()
+
+    assert queues.get("q1") is queues.get("q1")
+    assert queues.get("q1") is not queues.get("q2")
+    assert len(queues) == 2
+
+
+def test_streaming_queues_discard():
+    queues = StreamingQueues()
+    queues.get("q1")
+
+    queues.discard("q1")
+    queues.discard("missing")
+
+    assert "q1" not in queues
+    assert len(queues) == 0
+
+
+def test_streaming_queues_sweep_idle_queues(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("src.pipelines.common.time.monotonic", lambda: now)
+    queues = StreamingQueues(ttl=180.0, sweep_interval=30.0)
+
+    queues.get("abandoned")
+    now += 120.0
+    queues.get("active")
+    now += 90.0
+    queues.get("active")
+    queues.get("new")
+
+    assert "abandoned" not in queues
+    assert "active" in queues
+    assert "new" in queues
+
+
+@pytest.mark.asyncio
+async def test_streaming_queues_consume_until_done():
+    queues = StreamingQueues()
+    queue = queues.get("q1")
+    for chunk in ("Hello", "", " world", "<DONE>", "ignored"):
+        queue.put_nowait(chunk)
+
+    chunks = [chunk async for chunk in queues.consume("q1")]
+
+    assert chunks == ["Hello", " world"]
+    assert "q1" not in queues
+
+
+@pytest.mark.asyncio
+async def test_streaming_queues_consume_waits_for_producer():
+    queues = StreamingQueues()
+
+    async def produce():
+        await asyncio.sleep(0)
+        queues.get("q1").put_nowait("late")
+        queues.get("q1").put_nowait("<DONE>")
+
+    task = asyncio.create_task(produce())
+    chunks = [chunk async for chunk in queues.consume("q1")]
+    await task
+
+    assert chunks == ["late"]
+
+
+@pytest.mark.asyncio
+async def test_streaming_queues_consume_drops_queue_on_timeout():
+    queues = StreamingQueues()
+
+    chunks = [chunk async for chunk in queues.consume("q1", timeout=0.01)]
+
+    assert chunks == []
+    assert "q1" not in queues
+
+
+@pytest.mark.asyncio
+async def test_streaming_queues_consume_drains_chunks_appended_while_yielding():
+    queues = StreamingQueues()
+    buffer = queues.get("q1")
+    buffer.put_nowait("a")
+
+    chunks = []
+    async for chunk in queues.consume("q1"):
+        chunks.append(chunk)
+        if chunk == "a":
+            buffer.put_nowait("b")
+            buffer.put_nowait("<DONE>")
+
+    assert chunks == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_inflight_coalescer_shares_overlapping_calls():
+    coalescer = InflightCoalescer()
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"replies": ["chart"]}
+
+    runs = await asyncio.gather(
+        coalescer.run("prompt", generate),
+        coalescer.run("prompt", generate),
+        coalescer.run("other prompt", generate),
+    )
+    (first, second, other), shared = zip(*runs)
+
+    assert first is second
+    assert other == {"replies": ["chart"]}
+    assert shared == (False, True, False)
+    assert calls == 2
+    assert len(coalescer) == 0
+
+
+@pytest.mark.asyncio
+async def test_inflight_coalescer_does_not_keep_results():
+    coalescer = InflightCoalescer()
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await coalescer.run("prompt", generate) == (1, False)
+    assert await coalescer.run("prompt", generate) == (2, False)
+
+
+@pytest.mark.asyncio
+async def test_inflight_coalescer_generate_strips_meta_for_shared_calls():
+    coalescer = InflightCoalescer()
+    prompts = []
+
+    async def generator(prompt):
+        prompts.append(prompt)
+        await asyncio.sleep(0.01)
+        return {"replies": [prompt], "meta": [{"usage": {"total_tokens": 10}}]}
+
+    async def other_generator(prompt):
+        return await generator(prompt)
+
+    first, second, other = await asyncio.gather(
+        coalescer.generate(generator, "chart"),
+        coalescer.generate(generator, "chart"),
+        coalescer.generate(other_generator, "chart"),
+    )
+
+    assert prompts == ["chart", "chart"]
+    assert first["meta"] and other["meta"]
+    assert second == {"replies": ["chart"]}
+
+
+@pytest.mark.asyncio
+async def test_generation_cache_shares_concurrent_misses_and_reuses_replies():
+    cache = GenerationCache()
+    calls = 0
+
+    async def generator(prompt):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"replies": [prompt], "meta": [{"usage": {"total_tokens": 10}}]}
+
+    first, second = await asyncio.gather(
+        cache.generate(generator, "models"),
+        cache.generate(generator, "models"),
+    )
+    again = await cache.generate(generator, "models")
+
+    assert calls == 1
+    assert first["meta"]
+    assert second == again == {"replies": ["models"]}
+
+
+@pytest.mark.asyncio
+async def test_generation_cache_with_zero_ttl_always_calls_the_model():
+    cache = GenerationCache(ttl=0)
+    calls = 0
+
+    async def generator(prompt):
+        nonlocal calls
+        calls += 1
+        return {"replies": [prompt], "meta": [{"usage": {"total_tokens": 10}}]}
+
+    first = await cache.generate(generator, "models")
+    again = await cache.generate(generator, "models")
+
+    assert calls == 2
+    assert first["meta"] and again["meta"]
+
+
+def test_semantic_cache_returns_most_similar_entry_above_threshold():
+    cache = SemanticCache(threshold=0.95)
+    cache.set("project", [1.0, 0.0, 0.0], "first")
+    cache.set("project", [0.0, 1.0, 0.0], "second")
+
+    assert cache.get("project", [2.0, 0.1, 0.0]) == "first"
+    assert cache.get("project", [0.1, 3.0, 0.0]) == "second"
+    assert cache.get("project", [1.0, 1.0, 0.0]) is None
+    assert cache.get("other project", [1.0, 0.0, 0.0]) is None
+
+
+def test_semantic_cache_expires_and_bounds_entries(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("src.pipelines.common.time.monotonic", lambda: now)
+    cache = SemanticCache(threshold=0.99, ttl=60.0, maxsize_per_namespace=2)
+
+    cache.set("project", [1.0, 0.0, 0.0], "old")
+    now += 61.0
+    assert cache.get("project", [1.0, 0.0, 0.0]) is None
+
+    cache.set("project", [0.0, 1.0, 0.0], "a")
+    cache.set("project", [0.0, 0.0, 1.0], "b")
+    cache.set("project", [1.0, 1.0, 0.0], "c")
+
+    assert cache.get("project", [0.0, 1.0, 0.0]) is None
+    assert cache.get("project", [0.0, 0.0, 1.0]) == "b"
+    assert cache.get("project", [1.0, 1.0, 0.0]) == "c"
@@ -5,6 +5,7 @@ These tests verify the behavior of individual extracted methods
 without needing to run the full ask() pipeline.
 """
 
+import asyncio
 from unittest.mock import AsyncMock, Mock
 
 import pytest
@@ -880,6 +881,45 @@ class TestCheckHistoricalQuestion:
             scope="sql",
         )
 
+    @pytest.mark.asyncio
+    async def test_retrievals_run_concurrently_with_historical_question(
+        self, ask_service, mock_pipelines
+    ):
+        """Test SQL samples and instructions are retrieved during the cache lookup."""
+        # Arrange
+        retrievals_started = asyncio.Event()
+
+        async def historical_question(**kwargs):
+            # only completes if the retrievals start before the lookup finishes
+            await asyncio.wait_for(retrievals_started.wait(), timeout=1)
+            return {"formatted_output": {"documents": []}}
+
+        async def sql_pairs_retrieval(**kwargs):
+            retrievals_started.set()
+            return {"formatted_output": {"documents": [{"sql": "SELECT 1"}]}}
+
+        mock_pipelines["historical_question"].run = historical_question
+        mock_pipelines["sql_pairs_retrieval"].run = sql_pairs_retrieval
+        mock_pipelines["instructions_retrieval"].run = AsyncMock(
+            return_value={"formatted_output": {"documents": []}}
+        )
+
+        # Act
+        (
+            api_results,
+            sql_reasoning,
+            sql_samples,
+            instructions,
+        ) = await ask_service._check_historical_question(
+            user_query="Test query",
+            project_id="project-123",
+        )
+
+        # Assert
+        assert api_results is None
+        assert sql_samples == [{"sql": "SELECT 1"}]
+        assert instructions == []
+
     @pytest.mark.asyncio
     async def test_empty_formatted_output_is_cache_miss(
         self, ask_service, mock_pipelines
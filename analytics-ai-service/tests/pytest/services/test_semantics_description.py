@@ -186,6 +186,26 @@ def test_batch_processing_with_custom_chunk_size(
     assert chunks[3]["selected_models"] == ["model4"]
 
 
+def test_batch_processing_packs_small_models_per_call():
+    service = SemanticsDescription(pipelines={}, models_per_call=3)
+    request = SemanticsDescription.GenerateRequest(
+        id="test_id",
+        user_prompt="Describe the models",
+        selected_models=["model1", "model2", "model3", "model4"],
+        mdl='{"models": [{"name": "model1", "columns": [{"name": "column1", "type": "varchar", "notNull": false}, {"name": "column2", "type": "varchar", "notNull": false}, {"name": "column3", "type": "varchar", "notNull": false}]}, {"name": "model2", "columns": [{"name": "column1", "type": "varchar", "notNull": false}]}, {"name": "model3", "columns": [{"name": "column1", "type": "varchar", "notNull": false}]}, {"name": "model4", "columns": [{"name": "column1", "type": "varchar", "notNull": false}]}]}',
+    )
+
+    chunks = service._chunking(orjson.loads(request.mdl), request, chunk_size=2)
+
+    # the column budget splits model1, and its remainder shares a call with model2
+    assert [chunk["selected_models"] for chunk in chunks] == [
+        ["model1"],
+        ["model1", "model2"],
+        ["model3", "model4"],
+    ]
+    assert [len(model["columns"]) for model in chunks[1]["mdl"]["models"]] == [1, 1]
+
+
 @pytest.mark.asyncio
 async def test_batch_processing_partial_failure(
     service: SemanticsDescription,
@@ -17,9 +17,15 @@ def test_settings_default_values():
 
         assert settings.query_cache_ttl == 3600
         assert settings.query_cache_maxsize == 1_000_000
+        assert settings.warmup_services is False
+        assert settings.intent_classification_semantic_cache_threshold is None
+        assert settings.intent_classification_timeout == 15.0
+        assert settings.semantics_description_models_per_call == 1
+        assert settings.generation_cache_ttl == 3600
 
         assert settings.langfuse_host == "https://cloud.langfuse.com"
         assert settings.langfuse_enable is True
+        assert settings.langfuse_sample_rate == 1.0
 
         assert settings.logging_level == "INFO"
         assert settings.development is False
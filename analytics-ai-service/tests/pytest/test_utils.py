@@ -56,6 +56,28 @@ def test_service_metadata(service_metadata: ServiceMetadata):
     assert service_metadata.service_version == "0.8.0-mock"
 
 
+def test_service_metadata_does_not_copy_providers():
+    class Provider:
+        def get_model(self):
+            return "mock-llm-model"
+
+        def get_model_kwargs(self):
+            return {}
+
+        def __deepcopy__(self, memo):
+            raise AssertionError("providers must not be copied")
+
+    current_path = os.path.dirname(__file__)
+    service_metadata = create_service_metadata(
+        pipe_components={"mock": PipelineComponent(llm_provider=Provider())},
+        pyproject_path=os.path.join(current_path, "../data/mock_pyproject.toml"),
+    )
+
+    assert service_metadata.pipes_metadata == {
+        "mock": {"llm_model": "mock-llm-model", "llm_model_kwargs": {}},
+    }
+
+
 def test_trace_metadata(service_metadata: ServiceMetadata, mocker: MockFixture):
     function = mocker.patch(
         "src.utils.langfuse_context.update_current_trace", return_value=None
@@ -86,6 +108,39 @@ def test_trace_metadata(service_metadata: ServiceMetadata, mocker: MockFixture):
     )
 
 
+def test_fetch_analytics_docs_is_cached(mocker: MockFixture):
+    utils._fetch_analytics_docs.cache_clear()
+    response = mocker.Mock(text="intro.md\nHello\n---\nguide.md\nWorld")
+    get = mocker.patch("src.utils.requests.get", return_value=response)
+
+    first = utils.fetch_analytics_docs("https://docs.mock/", True)
+    second = utils.fetch_analytics_docs("https://docs.mock", True)
+
+    assert (
+        first
+        == second
+        == [
+            {"path": "https://docs.mock/oss/intro", "content": "Hello"},
+            {"path": "https://docs.mock/oss/guide", "content": "World"},
+        ]
+    )
+    get.assert_called_once()
+    utils._fetch_analytics_docs.cache_clear()
+
+
+def test_fetch_analytics_docs_does_not_cache_failures(mocker: MockFixture):
+    utils._fetch_analytics_docs.cache_clear()
+    get = mocker.patch(
+        "src.utils.requests.get",
+        side_effect=utils.requests.RequestException("boom"),
+    )
+
+    assert utils.fetch_analytics_docs("https://docs.mock", False) == []
+    assert utils.fetch_analytics_docs("https://docs.mock", False) == []
+    assert get.call_count == 2
+    utils._fetch_analytics_docs.cache_clear()
+
+
 def test_clean_display_name():
     # Test empty and None cases
     assert clean_display_name("") == ""
@@ -209,3 +264,20 @@ def test_clean_display_name():
     )  # prefix 'o' stays, '-' becomes '_'
     assert clean_display_name("2023_sales") == "_2023_sales"
     assert clean_display_name("product_name!") == "product_name_"
+
+
+def test_closed_json_schema_is_built_once_per_model():
+    from pydantic import BaseModel
+
+    class Inner(BaseModel):
+        name: str
+
+    class Outer(BaseModel):
+        inner: Inner
+        tags: list[str]
+
+    schema = utils.closed_json_schema(Outer)
+
+    assert schema is utils.closed_json_schema(Outer)
+    assert schema["additionalProperties"] is False
+    assert schema["$defs"]["Inner"]["additionalProperties"] is False